@@ -0,0 +1,2 @@
+"""A stand-in for Fusion's adsk module, just complete enough to run the add-in's
+import and export code outside of Fusion for benchmarking."""
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+
+class LogLevels:
+    InfoLogLevel = 0
+    WarningLogLevel = 1
+    ErrorLogLevel = 2
+
+
+class LogTypes:
+    ConsoleLogType = 0
+    FileLogType = 1
+
+
+class DialogResults:
+    DialogOK = 0
+    DialogCancel = 1
+
+
+class EventHandler:
+    def __init__(self):
+        pass
+
+
+class CommandCreatedEventHandler(EventHandler):
+    pass
+
+
+class CommandEventHandler(EventHandler):
+    pass
+
+
+class CustomEventHandler(EventHandler):
+    pass
+
+
+class CommandCreatedEventArgs:
+    pass
+
+
+class CommandEventArgs:
+    pass
+
+
+class CustomEventArgs:
+    pass
+
+
+class Event:
+    def __init__(self):
+        self.handlers: list[EventHandler] = []
+
+
+class CustomEvent(Event):
+    def add(self, handler: CustomEventHandler):
+        self.handlers.append(handler)
+        return True
+
+
+class RadioButtonGroupCommandInput:
+    pass
+
+
+class ToolbarControl:
+    pass
+
+
+class CommandDefinition:
+    pass
+
+
+class ValueInput:
+    def __init__(self, string_value: str):
+        self.stringValue = string_value
+
+    @staticmethod
+    def createByString(string_value: str):
+        return ValueInput(string_value)
+
+
+class Point3D:
+    def __init__(self, x: float, y: float, z: float):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+class BoundingBox3D:
+    def __init__(self, min_point: Point3D, max_point: Point3D):
+        self.minPoint = min_point
+        self.maxPoint = max_point
+
+
+class ProgressDialog:
+    def __init__(self):
+        self.isCancelButtonShown = False
+        self.cancelButtonText = ""
+        self.wasCancelled = False
+        self.progressValue = 0
+        self.message = ""
+
+    def show(self, title, message, minimum, maximum, delay=0):
+        return True
+
+    def hide(self):
+        return True
+
+
+class _Dialog:
+    def __init__(self, path: str):
+        self.folder = path
+        self.filename = path
+        self.title = ""
+        self.filter = ""
+        self.filterIndex = 0
+        self.isMultiSelectEnabled = False
+
+    def showDialog(self):
+        return DialogResults.DialogOK
+
+    def showOpen(self):
+        return DialogResults.DialogOK
+
+    def showSave(self):
+        return DialogResults.DialogOK
+
+
+class UserInterface:
+    def __init__(self):
+        self.messages: list[str] = []
+        # what the folder and file dialogs return
+        self.dialog_path = ""
+
+    def messageBox(self, text: str, *args):
+        self.messages.append(text)
+        return 0
+
+    def createProgressDialog(self):
+        return ProgressDialog()
+
+    def createFolderDialog(self):
+        return _Dialog(self.dialog_path)
+
+    def createFileDialog(self):
+        return _Dialog(self.dialog_path)
+
+
+class _DataFile:
+    def __init__(self):
+        self.id = "urn:benchmark"
+        self.versionNumber = 1
+
+
+class Document:
+    def __init__(self):
+        self.isModified = False
+        self.dataFile = _DataFile()
+
+
+class Application:
+    _instance: Application | None = None
+
+    def __init__(self):
+        self.userInterface = UserInterface()
+        self.activeProduct = None
+        self.activeDocument = Document()
+        self._events: dict[str, CustomEvent] = {}
+        self._fired: list[str] = []
+
+    @staticmethod
+    def get():
+        if Application._instance is None:
+            Application._instance = Application()
+        return Application._instance
+
+    def log(self, message: str, level=0, log_type=0):
+        pass
+
+    def registerCustomEvent(self, event_id: str):
+        self._events[event_id] = CustomEvent()
+        return self._events[event_id]
+
+    def unregisterCustomEvent(self, event_id: str):
+        return self._events.pop(event_id, None) is not None
+
+    def fireCustomEvent(self, event_id: str, additional_info: str = ""):
+        self._fired.append(event_id)
+        return True
+
+    def run_events(self):
+        """Delivers the fired custom events until none are left, the way
+        Fusion does whenever it is idle."""
+        while self._fired:
+            event = self._events.get(self._fired.pop(0))
+            if event is None:
+                continue
+            for handler in list(event.handlers):
+                handler.notify(CustomEventArgs())
@@ -0,0 +1,209 @@
+from __future__ import annotations
+import os
+import re
+import time
+
+from . import core
+
+_NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+class TriangleMeshQualityOptions:
+    NormalQualityTriangleMesh = 0
+    LowQualityTriangleMesh = 1
+    HighQualityTriangleMesh = 2
+
+
+class MeshRefinementSettings:
+    MeshRefinementHigh = 0
+    MeshRefinementMedium = 1
+    MeshRefinementLow = 2
+    MeshRefinementCustom = 3
+
+
+class ExportOptions:
+    def __init__(self, export_format: str, path: str):
+        self.format = export_format
+        self.filename = path
+        self.meshRefinement = MeshRefinementSettings.MeshRefinementMedium
+        self.surfaceDeviation = 0.0
+        self.normalDeviation = 0.0
+        self.maximumEdgeLength = 0.0
+
+
+class Parameter:
+    def __init__(self, design: Design, name: str, expression: str, unit: str):
+        self._design = design
+        self.name = name
+        self.unit = unit
+        self.isFavorite = True
+        self.createdBy = None
+        self._expression = expression
+
+    @property
+    def expression(self):
+        return self._expression
+
+    @expression.setter
+    def expression(self, expression: str):
+        self._design._check({self.name: expression})
+        self._expression = expression
+        self._design._recompute()
+
+    @property
+    def dependentParameters(self):
+        return [
+            param
+            for param in self._design._parameters.values()
+            if self.name in self._design._references(param.expression)
+        ]
+
+
+class ParameterList:
+    def __init__(self, design: Design):
+        self._design = design
+
+    def __iter__(self):
+        return iter(list(self._design._parameters.values()))
+
+    def __len__(self):
+        return len(self._design._parameters)
+
+    @property
+    def count(self):
+        return len(self._design._parameters)
+
+    def itemByName(self, name: str):
+        return self._design._parameters.get(name)
+
+
+class UnitsManager:
+    def __init__(self, design: Design):
+        self._design = design
+
+    def isValidExpression(self, expression: str, unit: str):
+        return bool(expression.strip())
+
+
+class ExportManager:
+    def __init__(self, design: Design):
+        self._design = design
+
+    def createSTLExportOptions(self, component, path: str):
+        return ExportOptions("stl", path)
+
+    def createSTEPExportOptions(self, path: str, component):
+        return ExportOptions("step", path)
+
+    def createOBJExportOptions(self, component, path: str):
+        return ExportOptions("obj", path)
+
+    def createC3MFExportOptions(self, component, path: str):
+        return ExportOptions("3mf", path)
+
+    def execute(self, options: ExportOptions):
+        if self._design.export_cost:
+            time.sleep(self._design.export_cost)
+        with open(options.filename, "wb") as export_file:
+            export_file.write(os.urandom(self._design.export_size))
+        self._design.exports += 1
+        return True
+
+
+class Component:
+    def __init__(self, design: Design):
+        self.parentDesign = design
+        # nothing to tessellate, meshes always come from the export manager
+        self.bRepBodies = []
+        self.allOccurrences = []
+        # a 10 cm cube, for sizing draft meshes
+        self.boundingBox = core.BoundingBox3D(
+            core.Point3D(0.0, 0.0, 0.0), core.Point3D(10.0, 10.0, 10.0)
+        )
+
+
+class _Timeline:
+    def __init__(self, count: int):
+        self.count = count
+
+
+class Design:
+    """A design without geometry whose parameters behave like Fusion's: an
+    expression referencing a missing parameter or creating a cycle is
+    rejected, and every accepted change costs a recompute.
+
+    Arguments:
+    expressions -- The expression of every parameter by name.
+    recompute_cost -- Seconds every recompute takes.
+    export_cost -- Seconds every exported file takes.
+    export_size -- Bytes written for every exported file.
+    """
+
+    def __init__(
+        self,
+        expressions: dict[str, str],
+        recompute_cost: float = 0.0,
+        export_cost: float = 0.0,
+        export_size: int = 1024,
+        unit: str = "mm",
+    ):
+        self._parameters = {
+            name: Parameter(self, name, expression, unit)
+            for name, expression in expressions.items()
+        }
+        self.recompute_cost = recompute_cost
+        self.export_cost = export_cost
+        self.export_size = export_size
+        self.recomputes = 0
+        self.exports = 0
+        self.allParameters = ParameterList(self)
+        self.userParameters = ParameterList(self)
+        self.unitsManager = UnitsManager(self)
+        self.exportManager = ExportManager(self)
+        self.activeComponent = Component(self)
+        self.rootComponent = self.activeComponent
+        self.timeline = _Timeline(len(expressions))
+
+    @staticmethod
+    def cast(product):
+        return product
+
+    def _references(self, expression: str):
+        return {
+            name
+            for name in _NAME_PATTERN.findall(expression)
+            if name in self._parameters
+        }
+
+    def _check(self, changes: dict[str, str]):
+        """Raises like Fusion if the changed expressions would form a cycle."""
+
+        def expression(name: str):
+            return changes.get(name, self._parameters[name].expression)
+
+        for name in changes:
+            pending = list(self._references(changes[name]))
+            seen: set[str] = set()
+            while pending:
+                current = pending.pop()
+                if current == name:
+                    raise RuntimeError(f"Circular reference in {name}")
+                if current in seen:
+                    continue
+                seen.add(current)
+                pending.extend(self._references(expression(current)))
+
+    def _recompute(self):
+        self.recomputes += 1
+        if self.recompute_cost:
+            time.sleep(self.recompute_cost)
+
+    def modifyParameters(self, parameters: list[Parameter], values: list):
+        changes = {
+            param.name: value.stringValue for param, value in zip(parameters, values)
+        }
+        self._check(changes)
+        for param in parameters:
+            param._expression = changes[param.name]
+        self._recompute()
+        return True
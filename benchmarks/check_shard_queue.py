@@ -0,0 +1,89 @@
+"""Runs two workers against one shard queue with a fake clock, through claiming,
+a lease that expires, its shard being reclaimed by the other worker, and
+completing every shard. A new queue is refused while a worker still holds
+a lease.
+
+    python benchmarks/check_shard_queue.py
+
+Exits with an assertion error if the queue misbehaves.
+"""
+
+from __future__ import annotations
+import tempfile
+
+from run_benchmarks import load_add_in
+
+LEASE_TIMEOUT = 30.0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def main():
+    load_add_in()
+    from bulk_export.shard_queue import QueueBusyError, ShardQueue
+
+    clock = FakeClock()
+    with tempfile.TemporaryDirectory(prefix="bulk-export-queue-") as folder:
+        a = ShardQueue(folder, "a", LEASE_TIMEOUT, clock)
+        b = ShardQueue(folder, "b", LEASE_TIMEOUT, clock)
+        rows = [[f"variant_{index}", "x", f"{index} mm"] for index in range(5)]
+        count = a.create(["Export Name", "Activate Export", "p0"], rows, 2, {})
+        assert count == 5
+        assert b.exists() and b.info()["variants"] == 5 and b.is_compatible()
+        assert a.progress() == (0, 3)
+
+        # claiming: both workers get a shard of their own
+        first = a.claim()
+        second = b.claim()
+        assert first.id == "000000" and first.variants == rows[:2]
+        assert second.id == "000001" and second.variants == rows[2:4]
+
+        # the queue cannot be replaced while another worker exports from it
+        try:
+            b.create(["Export Name", "Activate Export", "p0"], rows, 2, {})
+        except QueueBusyError:
+            pass
+        else:
+            raise AssertionError("replaced a queue that is in use")
+        assert b.info()["variants"] == 5 and a.heartbeat(first)
+
+        # a heartbeat keeps the lease alive past the timeout
+        clock.now += LEASE_TIMEOUT - 1
+        assert a.heartbeat(first)
+        clock.now += LEASE_TIMEOUT - 1
+        assert b.heartbeat(second)
+        b.complete(second)
+        assert a.progress() == (1, 3)
+
+        # expiry: a stops sending heartbeats, b reclaims its shard before
+        # moving on to the one nobody claimed yet
+        clock.now += LEASE_TIMEOUT + 1
+        reclaimed = b.claim()
+        assert reclaimed.id == first.id and reclaimed.variants == first.variants
+        assert not a.heartbeat(first)
+        # releasing a lease that was taken over leaves it with its new worker
+        a.release(first)
+        assert b.heartbeat(reclaimed)
+
+        # completion: a takes the last shard and both run out of work
+        last = a.claim()
+        assert last.id == "000002" and last.variants == rows[4:]
+        b.complete(reclaimed)
+        a.complete(last)
+        assert a.claim() is None and b.claim() is None
+        assert b.progress() == (3, 3)
+
+        # once no lease is left, a new export can replace the queue
+        assert b.create(["Export Name", "Activate Export", "p0"], rows[:1], 2, {})
+        assert a.progress() == (0, 1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Expands sweep specifications and evaluates their constraints, through
+ranges, lists, zipped parameters, export name templates and the constraint
+syntax that is accepted and rejected.
+
+    python benchmarks/check_sweep_spec.py
+
+Exits with an assertion error if a sweep is expanded wrongly.
+"""
+
+from __future__ import annotations
+
+from run_benchmarks import load_add_in
+
+
+def main():
+    load_add_in()
+    from bulk_export.sweep_spec import SweepSpec, SweepSpecError
+
+    def variants(data: dict):
+        return list(SweepSpec(data).variants())
+
+    def rejected(data: dict):
+        try:
+            variants(data)
+        except SweepSpecError as e:
+            return str(e)
+        raise AssertionError(f"accepted {data}")
+
+    # expansion: the first parameter changes slowest, ranges include their
+    # end and units are added to the expressions
+    spec = SweepSpec(
+        {
+            "export_name": "part_{width}_{hole}",
+            "parameters": {
+                "width": {"range": [10, 20, 5], "unit": "mm"},
+                "hole": ["3 mm", "4 mm"],
+            },
+        }
+    )
+    assert spec.parameter_names == ["width", "hole"]
+    assert list(spec.variants()) == [
+        ("part_10_3 mm", ["10 mm", "3 mm"]),
+        ("part_10_4 mm", ["10 mm", "4 mm"]),
+        ("part_15_3 mm", ["15 mm", "3 mm"]),
+        ("part_15_4 mm", ["15 mm", "4 mm"]),
+        ("part_20_3 mm", ["20 mm", "3 mm"]),
+        ("part_20_4 mm", ["20 mm", "4 mm"]),
+    ]
+    # the variants are generated lazily, the same on every call
+    assert next(spec.variants()) == ("part_10_3 mm", ["10 mm", "3 mm"])
+
+    # float ranges do not pile up rounding errors in names or expressions
+    steps = variants({"parameters": {"t": {"range": [0, 0.3, 0.1]}}})
+    assert [name for name, _ in steps] == [f"variant_{index}" for index in range(4)]
+    assert [values for _, values in steps] == [["0"], ["0.1"], ["0.2"], ["0.3"]]
+
+    # zipped parameters change in lockstep, the default name counts variants
+    assert variants(
+        {
+            "parameters": {"a": [1, 2], "b": [3, 4], "c": {"values": [5]}},
+            "zip": [["a", "b"]],
+        }
+    ) == [("variant_0", ["1", "3", "5"]), ("variant_1", ["2", "4", "5"])]
+
+    # constraints leave combinations out, and index only counts the ones kept
+    assert variants(
+        {
+            "parameters": {"w": [1, 2, 3], "h": [1, 2, 3]},
+            "constraints": ["h < w", "w - h != 2"],
+        }
+    ) == [("variant_0", ["2", "1"]), ("variant_1", ["3", "2"])]
+
+    # the constraint syntax: arithmetic, chained comparisons, boolean logic
+    # and the allowed functions, applied to the numbers of the values
+    def holds(constraint: str, **values):
+        spec = SweepSpec(
+            {
+                "parameters": {name: [value] for name, value in values.items()},
+                "constraints": [constraint],
+            }
+        )
+        return bool(list(spec.variants()))
+
+    assert holds("1 < w <= 3", w=3)
+    assert not holds("1 < w < 3", w=3)
+    assert holds("w ** 2 % 5 == 4 and not w == 3", w="2 mm")
+    assert holds("max(w, h) // 2 == 2 or h > 10", w=4, h=1)
+    assert holds("sqrt(w) == 3 and abs(-h) == round(1.2)", w=9, h=1)
+    assert not holds("-w > +h", w=1, h=1)
+
+    # rejected syntax and names, most of them found when the sweep is read
+    for constraint in [
+        "w <",
+        "w.real > 0",
+        "w[0] > 0",
+        "__import__('os')",
+        "(lambda: 1)()",
+        "[w][0] > 0",
+        "round(w, ndigits=1) > 0",
+        "w if w else 1",
+        "h > 0",
+    ]:
+        problem = rejected({"parameters": {"w": [1]}, "constraints": [constraint]})
+        assert constraint in problem, problem
+
+    # constraints that cannot be evaluated for a combination
+    assert "cannot be evaluated" in rejected(
+        {"parameters": {"w": [0]}, "constraints": ["1 / w > 0"]}
+    )
+    assert "not a number" in rejected(
+        {"parameters": {"w": ["wide"]}, "constraints": ["w > 0"]}
+    )
+
+    # invalid specifications
+    for data in [
+        {},
+        {"parameters": {"w": {"unit": "mm"}}},
+        {"parameters": {"w": {"range": [0, 10]}}},
+        {"parameters": {"w": {"range": [0, 10, -1]}}},
+        {"parameters": {"w": {"range": [0, "10", 1]}}},
+        {"parameters": {"w": [True]}},
+        {"parameters": {"a": [1], "b": [1, 2]}, "zip": [["a", "b"]]},
+        {"parameters": {"a": [1]}, "zip": [["a", "c"]]},
+        {"parameters": {"w": [1]}, "export_name": "{width}"},
+        {"parameters": {"w": [1]}, "export_name": "{w"},
+        {"parameters": {"index": [1, 2]}},
+    ]:
+        rejected(data)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Benchmarks the add-in outside of Fusion, against the fake adsk module next to
+this file.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --compare results.json
+
+Every result is the best of a few repeats and has a rate, higher is better.
+With --compare the run fails if any rate dropped by more than the tolerance.
+"""
+
+from __future__ import annotations
+import argparse
+import csv
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+BENCHMARK_FOLDER = Path(__file__).resolve().parent
+ADD_IN_FOLDER = BENCHMARK_FOLDER.parent
+# the fake adsk module has to win over a real one
+sys.path.insert(0, str(BENCHMARK_FOLDER))
+
+import adsk.core
+import adsk.fusion
+
+SIZES = {
+    "full": {
+        "rows": [100, 1000, 10000],
+        "columns": [5, 25, 100],
+        "depths": [1, 10, 50],
+        "apply_rows": 200,
+        "export_rows": [50, 500],
+    },
+    "quick": {
+        "rows": [100, 1000],
+        "columns": [5, 25],
+        "depths": [1, 10],
+        "apply_rows": 50,
+        "export_rows": [50],
+    },
+}
+
+
+def load_add_in():
+    """Imports the add-in as a package, the way Fusion does."""
+    package = types.ModuleType("bulk_export")
+    package.__path__ = [str(ADD_IN_FOLDER)]
+    sys.modules["bulk_export"] = package
+    spec = importlib.util.spec_from_file_location(
+        "bulk_export.main", ADD_IN_FOLDER / "parametric-bulk-export.py"
+    )
+    main = importlib.util.module_from_spec(spec)
+    sys.modules["bulk_export.main"] = main
+    spec.loader.exec_module(main)
+    app = adsk.core.Application.get()
+    event = app.registerCustomEvent(main.EXPORT_TICK_EVENT_ID)
+    main.futil.add_handler(event, main._on_export_tick, name="export tick")
+    return main
+
+
+def measure(function, repeat: int):
+    """Runs the function a few times and returns its fastest run in seconds and
+    what that run returned."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = function()
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best[0]:
+            best = (seconds, value)
+    return best
+
+
+def chain_model(columns: int, depth: int):
+    """A model with independent parameters and a chain of parameters that each
+    reference the previous one, c1 = c0 + 1 mm and so on."""
+    expressions = {f"p{index}": "1 mm" for index in range(columns)}
+    expressions.update(
+        {
+            f"c{index}": f"c{index - 1} + 1 mm" if index else "1 mm"
+            for index in range(depth)
+        }
+    )
+    return expressions
+
+
+def chain_row(row: int, columns: int, depth: int):
+    """Values for the model of chain_model that turn the chain around, which
+    only works when the chain is applied from its end: the worst case for
+    applying the columns in file order and retrying the ones that failed."""
+    values = {f"p{index}": f"{row % 7 + index + 1} mm" for index in range(columns)}
+    if depth > 1:
+        values.update(
+            {f"c{index}": f"c{index + 1} + 1 mm" for index in range(depth - 1)}
+        )
+    if depth:
+        values[f"c{depth - 1}"] = f"{row % 7 + 2} mm"
+    return values
+
+
+def write_parameter_file(path: str, rows: int, columns: int, depth: int = 0):
+    names = list(chain_row(0, columns, depth))
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file, dialect=csv.excel)
+        writer.writerow(["Export Name", "Activate Export"] + names)
+        for row in range(rows):
+            values = chain_row(row, columns, depth)
+            writer.writerow([f"variant_{row}", "x"] + [values[name] for name in names])
+
+
+def bench_read(main, folder: str, sizes: dict, arguments):
+    results = []
+    for rows in sizes["rows"]:
+        for columns in sizes["columns"]:
+            path = os.path.join(folder, f"read_{rows}_{columns}.csv")
+            write_parameter_file(path, rows, columns)
+            seconds, count = measure(
+                lambda: sum(
+                    1 for row in main.read_parameters_from_file(path) if row.params
+                ),
+                arguments.repeat,
+            )
+            results.append(
+                result(
+                    "read_parameters_from_file",
+                    {"rows": rows, "columns": columns},
+                    seconds,
+                    count,
+                    "rows/s",
+                )
+            )
+    return results
+
+
+def bench_apply(main, folder: str, sizes: dict, arguments):
+    results = []
+    rows = sizes["apply_rows"]
+    for batch in [True, False]:
+        for depth in sizes["depths"]:
+            for columns in sizes["columns"]:
+                path = os.path.join(folder, f"apply_{columns}_{depth}.csv")
+                write_parameter_file(path, rows, columns, depth)
+                variations = list(main.read_parameters_from_file(path))
+                main.config.BATCH_PARAMETER_UPDATES = batch
+
+                def apply_all():
+                    design = adsk.fusion.Design(
+                        chain_model(columns, depth),
+                        recompute_cost=arguments.recompute_cost,
+                    )
+                    ui = adsk.core.Application.get().userInterface
+                    state = main.ParameterState(design)
+                    failed = 0
+                    for variation in variations:
+                        updates = main.apply_parameters(ui, design, variation, state)
+                        failed += sum(1 for update in updates if not update.ok)
+                    return design.recomputes, failed
+
+                seconds, (recomputes, failed) = measure(apply_all, arguments.repeat)
+                results.append(
+                    result(
+                        "apply_parameters",
+                        {"columns": columns, "depth": depth, "batch": batch},
+                        seconds,
+                        rows,
+                        "rows/s",
+                        recomputes_per_row=recomputes / rows,
+                        failed_updates=failed,
+                    )
+                )
+    main.config.BATCH_PARAMETER_UPDATES = True
+    return results
+
+
+def bench_export(main, folder: str, sizes: dict, arguments):
+    results = []
+    app = adsk.core.Application.get()
+    # every run has to export everything again, and every variant on its own:
+    # reusing the files of the previous run would measure skipping exports
+    # instead
+    main.config.EXPORT_CACHE = False
+    main.config.DEDUPLICATE_OUTPUTS = None
+    for rows in sizes["export_rows"]:
+        path = os.path.join(folder, f"export_{rows}.csv")
+        write_parameter_file(path, rows, 5)
+        output_folder = os.path.join(folder, "output")
+
+        def export_all():
+            shutil.rmtree(output_folder, ignore_errors=True)
+            os.makedirs(output_folder)
+            design = adsk.fusion.Design(
+                chain_model(5, 0),
+                recompute_cost=arguments.recompute_cost,
+                export_cost=arguments.export_cost,
+            )
+            app.activeProduct = design
+            app.userInterface.dialog_path = output_folder
+            handler = main.BulkExportCommandExecuteHandler()
+            handler.export(path, True, True, False, False)
+            app.run_events()
+            return design.exports
+
+        seconds, exports = measure(export_all, arguments.repeat)
+        results.append(
+            result(
+                "export",
+                {"rows": rows, "formats": 2},
+                seconds,
+                rows,
+                "variants/s",
+                files=exports,
+            )
+        )
+    return results
+
+
+def result(name: str, params: dict, seconds: float, count: int, unit: str, **extra):
+    return {
+        "benchmark": name,
+        "params": params,
+        "seconds": seconds,
+        "rate": count / seconds if seconds > 0 else float("inf"),
+        "unit": unit,
+        **extra,
+    }
+
+
+def result_key(entry: dict):
+    return entry["benchmark"] + json.dumps(entry["params"], sort_keys=True)
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float):
+    """Prints the results that got slower than in the baseline.
+
+    Returns the number of regressions.
+    """
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = {
+            result_key(entry): entry for entry in json.load(baseline_file)["results"]
+        }
+    regressions = 0
+    for entry in results:
+        before = baseline.get(result_key(entry))
+        if before is None:
+            continue
+        change = entry["rate"] / before["rate"] - 1 if before["rate"] else 0.0
+        if change < -tolerance:
+            regressions += 1
+            print(
+                f"REGRESSION {entry['benchmark']} {entry['params']}: "
+                f"{before['rate']:.1f} -> {entry['rate']:.1f} {entry['unit']} "
+                f"({change:+.0%})",
+                file=sys.stderr,
+            )
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ADD_IN_FOLDER,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+BENCHMARKS = {"read": bench_read, "apply": bench_apply, "export": bench_export}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="full")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--only", choices=BENCHMARKS, action="append", help="run only these"
+    )
+    parser.add_argument("--output", help="write the results to this file")
+    parser.add_argument("--compare", help="results of an earlier run to compare to")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="how much slower than the earlier run counts as a regression",
+    )
+    parser.add_argument(
+        "--recompute-cost", type=float, default=0.0, help="seconds per recompute"
+    )
+    parser.add_argument(
+        "--export-cost", type=float, default=0.0, help="seconds per exported file"
+    )
+    arguments = parser.parse_args()
+
+    add_in = load_add_in()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bulk-export-bench-") as folder:
+        for name, benchmark in BENCHMARKS.items():
+            if arguments.only and name not in arguments.only:
+                continue
+            results += benchmark(add_in, folder, SIZES[arguments.size], arguments)
+
+    document = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "size": arguments.size,
+            "repeat": arguments.repeat,
+            "recompute_cost": arguments.recompute_cost,
+            "export_cost": arguments.export_cost,
+        },
+        "results": results,
+    }
+    text = json.dumps(document, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as output_file:
+            output_file.write(text + "\n")
+    else:
+        print(text)
+    if arguments.compare and compare(results, arguments.compare, arguments.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,4 +18,128 @@ ADDIN_NAME = os.path.basename(os.path.dirname(__file__))
 COMPANY_NAME = 'ACME'
 
 # Palettes
-sample_palette_id = f'{COMPANY_NAME}_{ADDIN_NAME}_palette_id'
\ No newline at end of file
+sample_palette_id = f'{COMPANY_NAME}_{ADDIN_NAME}_palette_id'
+
+# Apply all the parameters of a variation as a single change so the design is
+# only recomputed once. Falls back to setting the parameters one at a time if
+# the design does not support it or rejects the change.
+BATCH_PARAMETER_UPDATES = True
+
+# Keep a manifest of the exported files in the output folder and skip the
+# variants whose files were already exported from the same document with the
+# same parameters and options. Only the parameters of the model are compared,
+# delete .bulk-export-manifest.json after changing anything else. Documents
+# with unsaved changes are always exported completely, unless the only changes
+# are the parameters an earlier run set and restored.
+EXPORT_CACHE = True
+EXPORT_CACHE_MAX_ENTRIES = 100000
+
+# What to do with a variant when one of its parameters cannot be set or one of
+# its files cannot be exported: "continue" exports it anyway, "skip" leaves it
+# out and "abort" stops the run. Either way every problem is collected into a
+# report that is shown when the run finishes.
+ERROR_POLICY = "continue"
+
+# When more than one mesh format is exported, tessellate the component once and
+# write all of them from that mesh instead of exporting each format separately.
+# Needs NumPy to be installed in Fusion's Python, otherwise it is ignored.
+SHARED_TESSELLATION = True
+
+# Export every file to a local staging folder first and move it to the output
+# folder on background threads while the next variant is recomputed. This
+# helps most when the output folder is on a network share.
+BACKGROUND_IO = True
+# Where to create the staging folder, None uses the system's temporary folder.
+STAGING_FOLDER = None
+IO_WORKERS = 2
+# Exports wait for the background threads once this many bytes are staged.
+STAGING_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# None to keep the files as they are, or "gzip" to compress them on the way.
+OUTPUT_COMPRESSION = None
+
+# Exports shared with other Fusion instances are split into shards of this many
+# variants, each instance claims a shard at a time.
+SHARD_SIZE = 20
+# Seconds after which a shard whose instance stopped reporting progress is
+# handed to another instance. Must be longer than exporting a single variant.
+SHARD_LEASE_TIMEOUT = 600
+
+# Time every stage of every variant. The report gets the number, total,
+# maximum, median and 95th percentile of every stage and the slowest variants,
+# which take the same memory however many variants are exported.
+RECORD_TIMINGS = False
+# Also keep every single timing and write them next to the report as JSON lines
+# and as a trace that chrome://tracing or Perfetto can open. A variant has a
+# few timings plus one per parameter, only the first TRACE_MAX_SPANS are kept.
+RECORD_TRACE = False
+TRACE_MAX_SPANS = 1000000
+
+# Log messages are buffered and written to a rotating log file in the
+# background. One of "trace", "debug", "info", "warning" or "error"; "trace"
+# also logs every single parameter that is set, which slows down large runs.
+LOG_LEVEL = "info"
+LOG_FILE = os.path.join(os.path.dirname(__file__), "logs", "bulk-export.log")
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+# How many messages are kept in memory until they are written to the log file.
+LOG_BUFFER_SIZE = 10000
+
+# When a component other than the root component is exported, variants that
+# differ from an exported one only in user parameters no other parameter
+# references get its files instead of being recomputed and exported. Such
+# parameters drive no feature. Any other parameter counts as changing the
+# component, sketches of other components may drive its features. Not used
+# with ARCHIVE_OUTPUTS, which stores identical files only once anyway.
+REUSE_UNCHANGED_GEOMETRY = True
+# Hard link those files instead of copying them, where the file system allows.
+# Exported files replace the ones of earlier runs instead of being written into
+# them, so exporting a variant again never changes the files linked to it.
+LINK_REUSED_GEOMETRY = True
+
+# Keep exported files with the same content only once: None keeps every file,
+# "link" replaces duplicates by hard links to the first file, "manifest"
+# deletes them and lists them in bulk-export-duplicates.json instead. Meshes
+# written from a shared tessellation count as the same when their vertices
+# match after rounding to DEDUPLICATE_QUANTUM millimeters, no matter in which
+# order the vertices and triangles are, other files when their bytes match.
+# Linked files share their content, so "link" relies on files of later runs
+# replacing the old ones instead of being written into them.
+DEDUPLICATE_OUTPUTS = "link"
+DEDUPLICATE_QUANTUM = 0.001
+
+# Draft exports trade accuracy for speed, to check a sweep before the final
+# run. Their meshes get about this many triangles whatever the size of the
+# variant, and their files this suffix so they never replace final ones.
+# Rows of a parameter file can pick their own with a "Fidelity" column holding
+# "draft" or "final".
+DRAFT_TRIANGLE_BUDGET = 5000
+DRAFT_NAME_SUFFIX = ".draft"
+
+# Run the job files (*.job.json) put into this folder one after another,
+# without any dialogs, and write the result of each next to it as
+# *.result.json. None to not look for job files.
+JOB_FOLDER = None
+# Seconds between looking for new job files.
+JOB_POLL_INTERVAL = 10
+# The job file in this environment variable runs as soon as the add-in started.
+JOB_FILE_ENVIRONMENT_VARIABLE = "BULK_EXPORT_JOB"
+
+# With "Export changes to the file", the parameter file is checked this often,
+# in seconds, after the export. Whenever it was saved, the rows that were added
+# or changed since are exported.
+WATCH_INTERVAL = 1
+# Also delete the files of the rows that were removed from the file.
+WATCH_REMOVE_DELETED_OUTPUTS = False
+
+# Pack the exported files into zip archives in the output folder as they are
+# exported, instead of leaving tens of thousands of files in it. A new archive
+# is started when one would get larger than ARCHIVE_MAX_BYTES. The archive
+# members of every variant, with its parameters, are listed in
+# bulk-export-archive-index.jsonl. Identical files are stored only once, so
+# DEDUPLICATE_OUTPUTS does not apply. With BACKGROUND_IO the files are packed
+# straight from the staging folder on the background threads, without going
+# through the output folder. ARCHIVE_COMPRESSION is one of "store", "deflate",
+# "bzip2" or "lzma".
+ARCHIVE_OUTPUTS = False
+ARCHIVE_COMPRESSION = "deflate"
+ARCHIVE_MAX_BYTES = 1024 * 1024 * 1024
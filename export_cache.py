@@ -0,0 +1,168 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from .file_lock import locked
+
+MANIFEST_FILE_NAME = ".bulk-export-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def variant_key(
+    document_version: str,
+    export_name: str,
+    params: dict[str, str],
+    export_format: str,
+    options: dict | None = None,
+):
+    """A hash of everything that determines the content of an exported file."""
+    data = json.dumps(
+        [document_version, export_name, params, export_format, options or {}],
+        sort_keys=True,
+    )
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _checksum(entries: dict):
+    data = json.dumps(entries, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ExportManifest:
+    """Remembers which files were exported for which variant key, so a re-run
+    can skip the variants whose outputs are still in the output folder.
+
+    The manifest is stored as a JSON file in the output folder. Paths are
+    stored relative to that folder. Instances sharing an export merge their
+    entries into the same file.
+    """
+
+    def __init__(self, folder: str, max_entries: int):
+        self.folder = Path(folder)
+        self.path = self.folder / MANIFEST_FILE_NAME
+        self.max_entries = max_entries
+        self.entries: dict[str, dict] = {}
+        # the files of the entries dropped since the last save, which other
+        # instances may still have in the file
+        self.removed: dict[str, list] = {}
+        self.hits = 0
+        self._dirty = False
+
+    def load(self):
+        """Reads the manifest, dropping it entirely if it fails the integrity
+        check, and then every entry whose files were changed or removed."""
+        entries = self._read()
+        if entries is None:
+            self.entries = {}
+            self._dirty = True
+            return
+        self.entries = {}
+        for key, entry in entries.items():
+            if self._files_match(entry):
+                self.entries[key] = entry
+            else:
+                self._drop(key, entry)
+
+    def _read(self):
+        """The entries in the file, None if it fails the integrity check."""
+        try:
+            with open(self.path, encoding="utf-8") as manifest_file:
+                data = json.load(manifest_file)
+            entries = data["entries"]
+            if data["version"] != MANIFEST_VERSION or data["checksum"] != _checksum(
+                entries
+            ):
+                raise ValueError("manifest checksum mismatch")
+        except FileNotFoundError:
+            return {}
+        except (ValueError, KeyError, TypeError):
+            return None
+        return entries
+
+    def _files_match(self, entry: dict):
+        for file in entry["files"]:
+            try:
+                stat = (self.folder / file["path"]).stat()
+            except OSError:
+                return False
+            if stat.st_size != file["size"] or stat.st_mtime_ns != file["mtime"]:
+                return False
+        return True
+
+    def _drop(self, key: str, entry: dict):
+        self.removed[key] = entry["files"]
+        self._dirty = True
+
+    def lookup(self, key: str):
+        """Returns True if the files for the key were exported and are unchanged."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+        if not self._files_match(entry):
+            del self.entries[key]
+            self._drop(key, entry)
+            return False
+        entry["used"] = time.time()
+        self.hits += 1
+        self._dirty = True
+        return True
+
+    def record(self, key: str, export_name: str, export_format: str, paths: list[str]):
+        files = []
+        for path in paths:
+            stat = os.stat(path)
+            files.append(
+                {
+                    "path": os.path.relpath(path, self.folder),
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime_ns,
+                }
+            )
+        self.entries[key] = {
+            "name": export_name,
+            "format": export_format,
+            "files": files,
+            "used": time.time(),
+        }
+        self.removed.pop(key, None)
+        self._dirty = True
+
+    def evict(self):
+        """Drops the least recently used entries above the size limit."""
+        if len(self.entries) <= self.max_entries:
+            return
+        by_use = sorted(self.entries, key=lambda key: self.entries[key]["used"])
+        for key in by_use[: len(self.entries) - self.max_entries]:
+            self._drop(key, self.entries.pop(key))
+
+    def save(self):
+        """Merges the entries into the file, keeping the ones other instances
+        saved in the meantime."""
+        if not self._dirty:
+            return
+        with locked(self.path):
+            entries = self._read() or {}
+            for key, files in self.removed.items():
+                # unless another instance exported the files again since
+                if key in entries and entries[key]["files"] == files:
+                    del entries[key]
+            for key, entry in self.entries.items():
+                saved = entries.get(key)
+                if saved is None or saved["used"] <= entry["used"]:
+                    entries[key] = entry
+            self.entries = entries
+            self.evict()
+            data = {
+                "version": MANIFEST_VERSION,
+                "checksum": _checksum(self.entries),
+                "entries": self.entries,
+            }
+            temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(temp_path, "w", encoding="utf-8") as manifest_file:
+                json.dump(data, manifest_file)
+            os.replace(temp_path, self.path)
+        self.removed.clear()
+        self._dirty = False
@@ -0,0 +1,72 @@
+from __future__ import annotations
+import json
+import time
+
+REPORT_FILE_NAME = "bulk-export-report.json"
+
+# What to do with a variant that had a problem.
+POLICY_CONTINUE = "continue"  # export it anyway
+POLICY_SKIP = "skip"  # do not export it and carry on with the next one
+POLICY_ABORT = "abort"  # stop the run
+ERROR_POLICIES = [POLICY_CONTINUE, POLICY_SKIP, POLICY_ABORT]
+
+# how many problems the summary lists before referring to the report file
+SUMMARY_LIMIT = 10
+
+
+class ExportReport:
+    """Collects the problems of a run so they can be reviewed once it finished
+    instead of stopping it with a message box for each one."""
+
+    def __init__(self):
+        self.problems: list[dict] = []
+        self.failed_variants: set[str] = set()
+        self.skipped_variants: list[str] = []
+        self.started = time.time()
+
+    def add(
+        self,
+        variant: str,
+        message: str,
+        parameter: str | None = None,
+        status: str = "failed",
+        export_format: str | None = None,
+    ):
+        problem = {"variant": variant, "status": status, "message": message}
+        if parameter is not None:
+            problem["parameter"] = parameter
+        if export_format is not None:
+            problem["format"] = export_format
+        self.problems.append(problem)
+        self.failed_variants.add(variant)
+
+    def skipped(self, variant: str):
+        self.skipped_variants.append(variant)
+
+    def write(self, path: str, summary: dict):
+        with open(path, "w", encoding="utf-8") as report_file:
+            json.dump(
+                {
+                    "started": self.started,
+                    "finished": time.time(),
+                    "summary": summary,
+                    "failed_variants": sorted(self.failed_variants),
+                    "skipped_variants": self.skipped_variants,
+                    "problems": self.problems,
+                },
+                report_file,
+                indent=2,
+            )
+
+    def describe(self):
+        if not self.problems:
+            return ""
+        lines = [
+            f"{len(self.problems)} problems in {len(self.failed_variants)} variants:"
+        ]
+        for problem in self.problems[:SUMMARY_LIMIT]:
+            subject = problem.get("parameter") or problem.get("format") or ""
+            lines.append(f"{problem['variant']}: {subject} {problem['message']}")
+        if len(self.problems) > SUMMARY_LIMIT:
+            lines.append(f"... and {len(self.problems) - SUMMARY_LIMIT} more")
+        return "\n".join(lines)
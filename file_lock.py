@@ -0,0 +1,33 @@
+from __future__ import annotations
+import contextlib
+import os
+import time
+from pathlib import Path
+
+# seconds after which the lock of an instance that died while holding it is
+# broken
+LOCK_TIMEOUT = 30
+
+
+@contextlib.contextmanager
+def locked(path: Path, timeout: float = LOCK_TIMEOUT):
+    """Keeps other instances sharing the output folder from writing the file
+    at the path until the with block is left."""
+    lock_path = path.with_name(path.name + ".lock")
+    while True:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            pass
+        try:
+            if time.time() - os.path.getmtime(lock_path) > timeout:
+                os.remove(lock_path)
+                continue
+        except FileNotFoundError:
+            continue
+        time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.remove(lock_path)
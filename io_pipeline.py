@@ -0,0 +1,179 @@
+from __future__ import annotations
+import contextlib
+import gzip
+import hashlib
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from typing import Callable
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz"}
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class OutputTransfer:
+    """A file exported to the staging folder that is moved to its final path,
+    or handed to deliver instead, along with what deliver returned."""
+
+    def __init__(
+        self,
+        staged_path: str,
+        final_path: str,
+        context,
+        deliver: Callable[[OutputTransfer], object] | None = None,
+    ):
+        self.staged_path = staged_path
+        self.final_path = final_path
+        self.context = context
+        self.deliver = deliver
+        self.result = None
+        self.size = 0
+        self.sha256: str | None = None
+        self.error: str | None = None
+
+
+class OutputPipeline:
+    """Moves exported files from a fast local staging folder to the output
+    folder on background threads, so the next variant can be recomputed while
+    the previous one is still being written to a slow or remote drive.
+
+    Files are hashed on the way and optionally compressed. They only appear
+    under their final name once completely written. When the staged files
+    waiting to be moved exceed max_staged_bytes, submit blocks until the
+    workers caught up.
+    """
+
+    def __init__(
+        self,
+        staging_folder: str | None,
+        workers: int,
+        max_staged_bytes: int,
+        compression: str | None = None,
+    ):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown compression {compression}")
+        self.staging_folder = tempfile.mkdtemp(
+            prefix="bulk-export-", dir=staging_folder
+        )
+        self.max_staged_bytes = max_staged_bytes
+        self.compression = compression
+        self._queue: queue.Queue[OutputTransfer | None] = queue.Queue()
+        self._completed: queue.Queue[OutputTransfer] = queue.Queue()
+        self._staged_bytes = 0
+        # the submitted transfers that did not complete yet
+        self._unfinished = 0
+        self._space = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"bulk-export-io-{index}")
+            for index in range(max(workers, 1))
+        ]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def final_path(self, path: str):
+        return path + COMPRESSION_SUFFIXES[self.compression]
+
+    def submit(
+        self,
+        staged_path: str,
+        final_path: str,
+        context=None,
+        deliver: Callable[[OutputTransfer], object] | None = None,
+    ):
+        """Queues a staged file to be moved to the final path. The context is
+        handed back with the transfer once it completed.
+
+        With deliver the file is hashed and handed to it on the background
+        thread instead, deliver has to remove the staged file.
+        """
+        size = os.path.getsize(staged_path)
+        with self._space:
+            # a single file larger than the limit still has to go through
+            while (
+                self._staged_bytes and self._staged_bytes + size > self.max_staged_bytes
+            ):
+                self._space.wait()
+            self._staged_bytes += size
+            self._unfinished += 1
+        transfer = OutputTransfer(
+            staged_path, self.final_path(final_path), context, deliver
+        )
+        transfer.size = size
+        self._queue.put(transfer)
+
+    def completed(self) -> list[OutputTransfer]:
+        """Returns the transfers that finished since the last call."""
+        transfers = []
+        while True:
+            try:
+                transfers.append(self._completed.get_nowait())
+            except queue.Empty:
+                return transfers
+
+    def drain(self):
+        """Waits until every file submitted so far completed."""
+        with self._space:
+            while self._unfinished:
+                self._space.wait()
+
+    def close(self):
+        """Waits for all queued files to be moved and removes the staging folder."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        shutil.rmtree(self.staging_folder, ignore_errors=True)
+
+    def _work(self):
+        while True:
+            transfer = self._queue.get()
+            if transfer is None:
+                return
+            try:
+                if transfer.deliver is not None:
+                    transfer.sha256 = _file_sha256(transfer.staged_path)
+                    transfer.result = transfer.deliver(transfer)
+                else:
+                    self._move(transfer)
+            except Exception as e:
+                transfer.error = str(e)
+            self._completed.put(transfer)
+            with self._space:
+                self._staged_bytes -= transfer.size
+                self._unfinished -= 1
+                self._space.notify_all()
+
+    def _move(self, transfer: OutputTransfer):
+        digest = hashlib.sha256()
+        temp_path = transfer.final_path + ".partial"
+        open_target = gzip.open if self.compression == "gzip" else open
+        try:
+            with open(transfer.staged_path, "rb") as source, open_target(
+                temp_path, "wb"
+            ) as target:
+                while True:
+                    chunk = source.read(_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    target.write(chunk)
+            os.replace(temp_path, transfer.final_path)
+        except BaseException:
+            # a failed clean up must not hide why the move failed
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            raise
+        os.remove(transfer.staged_path)
+        transfer.sha256 = digest.hexdigest()
+
+
+def _file_sha256(path: str):
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable
+
+from .mesh_refinement import FIDELITIES, FIDELITY_FINAL
+
+JOB_FILE_SUFFIX = ".job.json"
+RESULT_FILE_SUFFIX = ".result.json"
+
+# what became of a job, the "status" of its result file
+JOB_FINISHED = "finished"  # the run went through every variant
+JOB_STOPPED = "stopped"  # the run was cancelled or aborted
+JOB_REJECTED = "rejected"  # the run could not be started
+
+
+class JobFileError(ValueError):
+    pass
+
+
+class JobFile:
+    """Describes an export that runs without any dialogs.
+
+    Example::
+
+        {
+            "input": "brackets.json",
+            "output_folder": "exports/brackets",
+            "formats": ["stl", "3mf"],
+            "reorder": true,
+            "resume": true,
+            "fidelity": "draft",
+            "document": "urn:adsk.wipprod:dm.lineage:..."
+        }
+
+    "input" is a parameter file or a sweep, relative paths are relative to the
+    folder of the job file. With "join" set instead of "input", the job helps
+    with the export shared in the output folder. "document" is the id of the
+    Fusion document to export, it is opened if it is not the active one.
+    """
+
+    def __init__(self, path: str, data: dict, known_formats: list[str]):
+        if not isinstance(data, dict):
+            raise JobFileError("A job needs to be a JSON object")
+        self.path = str(Path(path).resolve())
+        folder = Path(self.path).parent
+        self.join = bool(data.get("join", False))
+        self.input: str | None = None
+        if not self.join:
+            if not isinstance(data.get("input"), str):
+                raise JobFileError("A job needs an 'input' file or 'join'")
+            self.input = str(folder / data["input"])
+        if not isinstance(data.get("output_folder"), str):
+            raise JobFileError("A job needs an 'output_folder'")
+        self.output_folder = str(folder / data["output_folder"])
+        self.formats = data.get("formats", ["stl"])
+        if not isinstance(self.formats, list) or not self.formats:
+            raise JobFileError("'formats' needs to be a list of formats")
+        unknown = [name for name in self.formats if name not in known_formats]
+        if unknown:
+            raise JobFileError(
+                f"Unknown formats {', '.join(map(str, unknown))}, "
+                f"use {', '.join(known_formats)}"
+            )
+        self.reorder = bool(data.get("reorder", False))
+        self.resume = bool(data.get("resume", False))
+        self.share = bool(data.get("share", False))
+        self.fidelity = data.get("fidelity", FIDELITY_FINAL)
+        if self.fidelity not in FIDELITIES:
+            raise JobFileError(
+                f"The fidelity {self.fidelity} is not one of {', '.join(FIDELITIES)}"
+            )
+        self.document: str | None = data.get("document")
+        self.result_path = result_path(path, data)
+
+    @staticmethod
+    def load(path: str, known_formats: list[str]):
+        try:
+            with open(path, encoding="utf-8") as job_file:
+                data = json.load(job_file)
+        except OSError as e:
+            raise JobFileError(f"Cannot read the job file: {e}")
+        except ValueError as e:
+            raise JobFileError(f"Invalid JSON: {e}")
+        return JobFile(path, data, known_formats)
+
+
+def result_path(job_path: str, data: dict | None = None):
+    """Where the result of a job is written, the "result" of its data if it
+    has one."""
+    path = str(Path(job_path).resolve())
+    if isinstance(data, dict) and isinstance(data.get("result"), str):
+        return str(Path(path).parent / data["result"])
+    if path.endswith(JOB_FILE_SUFFIX):
+        path = path[: -len(JOB_FILE_SUFFIX)]
+    return path + RESULT_FILE_SUFFIX
+
+
+def write_result(path: str, result: dict):
+    # written under another name first, so whoever waits for the result never
+    # reads half of it
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as result_file:
+        json.dump(result, result_file, indent=2)
+    os.replace(temp_path, path)
+
+
+def pending_jobs(folder: str, started: set[str]):
+    """The job files in the folder that have no result yet, oldest first.
+
+    Arguments:
+    folder -- The folder to look for job files in.
+    started -- The jobs that were already started and need no second run.
+    """
+    jobs = []
+    try:
+        entries = list(os.scandir(folder))
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.name.endswith(JOB_FILE_SUFFIX) or not entry.is_file():
+            continue
+        path = str(Path(entry.path).resolve())
+        if path in started or os.path.exists(result_path(path, _read_job(path))):
+            continue
+        jobs.append((entry.stat().st_mtime, entry.name, path))
+    return [path for _, _, path in sorted(jobs)]
+
+
+def _read_job(path: str):
+    """The data of a job file, None if it cannot be read, in which case its
+    result goes to the default path."""
+    try:
+        with open(path, encoding="utf-8") as job_file:
+            return json.load(job_file)
+    except (OSError, ValueError):
+        return None
+
+
+class JobFolderWatcher:
+    """Calls poll every interval seconds from a background thread.
+
+    The Fusion API must only be used from its main thread, so poll should do
+    nothing but fire a custom event that looks for new jobs.
+    """
+
+    def __init__(self, poll: Callable[[], None], interval: float):
+        self.poll = poll
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._work, name="bulk-export-jobs", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _work(self):
+        while not self._stopped.wait(self.interval):
+            self.poll()
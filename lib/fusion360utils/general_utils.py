@@ -9,9 +9,11 @@
 #  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
 #  UNINTERRUPTED OR ERROR FREE.
 
+import collections
 import os
 import traceback
 import adsk.core
+from . import log_utils
 
 app = adsk.core.Application.get()
 ui = app.userInterface
@@ -21,9 +23,53 @@ try:
     from ... import config
     DEBUG = config.DEBUG
 except:
+    config = None
     DEBUG = False
 
 
+def _create_logger():
+    if config is None:
+        return log_utils.BufferedLogger()
+    level = log_utils.LEVELS.get(str(config.LOG_LEVEL).lower())
+    buffered_logger = log_utils.BufferedLogger(
+        log_utils.INFO if level is None else level,
+        config.LOG_FILE,
+        config.LOG_MAX_BYTES,
+        config.LOG_BACKUPS,
+        config.LOG_BUFFER_SIZE,
+    )
+    if level is None:
+        message = (f'Unknown LOG_LEVEL {config.LOG_LEVEL!r}, logging at the info '
+                   f'level. Use one of {", ".join(log_utils.LEVELS)}')
+        buffered_logger.log(log_utils.WARNING, message)
+        app.log(message, adsk.core.LogLevels.WarningLogLevel,
+                adsk.core.LogTypes.ConsoleLogType)
+    return buffered_logger
+
+
+logger = _create_logger()
+
+# Messages for the Text Command window wait here until the log writer fires
+# this custom event, whose handler writes them on the main thread, so logging
+# never waits for the Fusion UI.
+CONSOLE_EVENT_ID = f'{__name__}.console'
+_console_messages = collections.deque(maxlen=10000)
+
+
+def _on_log_flushed():
+    if _console_messages:
+        app.fireCustomEvent(CONSOLE_EVENT_ID)
+
+
+logger.on_flush = _on_log_flushed
+
+_LOG_LEVELS = {
+    adsk.core.LogLevels.InfoLogLevel: log_utils.INFO,
+    adsk.core.LogLevels.WarningLogLevel: log_utils.WARNING,
+    adsk.core.LogLevels.ErrorLogLevel: log_utils.ERROR,
+}
+
+
 def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel, force_console: bool = False):
     """Utility function to easily handle logging in your app.
 
@@ -32,8 +78,8 @@ def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLe
     level -- The logging severity level.
     force_console -- Forces the message to be written to the Text Command window. 
     """    
-    # Always print to console, only seen through IDE.
-    print(message)  
+    # Always write to the log file, in the background.
+    logger.log(_LOG_LEVELS.get(level, log_utils.INFO), message)
 
     # Log all errors to Fusion log file.
     if level == adsk.core.LogLevels.ErrorLogLevel:
@@ -42,8 +88,35 @@ def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLe
 
     # If config.DEBUG is True write all log messages to the console.
     if DEBUG or force_console:
-        log_type = adsk.core.LogTypes.ConsoleLogType
-        app.log(message, level, log_type)
+        if logger.file_path is None:
+            # there is no log writer to hand them to
+            app.log(message, level, adsk.core.LogTypes.ConsoleLogType)
+        else:
+            _console_messages.append((message, level))
+
+
+def write_console(args=None):
+    """Writes the waiting log messages to the Text Command window. Must be
+    called on the main thread, it handles CONSOLE_EVENT_ID."""
+    while _console_messages:
+        message, level = _console_messages.popleft()
+        app.log(message, level, adsk.core.LogTypes.ConsoleLogType)
+
+
+def trace(message: str, *args):
+    """Logs a message from a hot loop, such as one per parameter. It is only
+    written to the log file and the args are only formatted into the message,
+    like message % args, when the trace level is enabled.
+    """
+    if logger.level <= log_utils.TRACE:
+        logger.log(log_utils.TRACE, message, *args)
+
+
+def flush_log():
+    """Writes the buffered log messages to the log file and the Text Command
+    window and stops writing in the background."""
+    logger.close()
+    write_console()
 
 
 def handle_error(name: str, show_message_box: bool = False):
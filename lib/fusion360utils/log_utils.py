@@ -0,0 +1,139 @@
+import collections
+import os
+import threading
+import time
+
+TRACE = 5
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {TRACE: 'TRACE', DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+LEVELS = {name.lower(): level for level, name in LEVEL_NAMES.items()}
+
+
+class BufferedLogger:
+    """A leveled logger that never writes to disk on the calling thread.
+
+    Messages go into a ring buffer that a background thread writes to a
+    rotating log file in batches. If the writer falls behind, the oldest
+    messages are dropped instead of slowing down the caller. Messages below
+    the level are discarded before they are formatted.
+
+    Arguments:
+    level -- The lowest level that is kept.
+    file_path -- The log file, or None to only keep the messages in memory.
+    max_bytes -- The size at which the log file is rotated.
+    backups -- How many rotated log files to keep.
+    capacity -- How many messages the ring buffer holds.
+    flush_interval -- Seconds between writes to the log file.
+
+    on_flush can be set to a function the background thread calls after
+    every write.
+    """
+
+    def __init__(
+            self,
+            level: int = INFO,
+            file_path: str = None,
+            max_bytes: int = 5 * 1024 * 1024,
+            backups: int = 3,
+            capacity: int = 10000,
+            flush_interval: float = 1.0
+    ):
+        self.level = level
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._buffer = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.on_flush = None
+
+    def log(self, level: int, message: str, *args):
+        """Queues a message. The args are only formatted into the message if
+        the level is enabled, like message % args."""
+        if level < self.level:
+            return
+        if args:
+            message = message % args
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append((time.time(), level, message))
+        if self.file_path is not None and self._thread is None and not self._closed:
+            self._start()
+
+    def flush(self):
+        """Writes everything in the ring buffer to the log file right away."""
+        if self.file_path is None:
+            return
+        with self._lock:
+            records = list(self._buffer)
+            self._buffer.clear()
+            dropped, self.dropped = self.dropped, 0
+        if not records and not dropped:
+            return
+        lines = [self._format(record) for record in records]
+        if dropped:
+            lines.insert(0, f'{dropped} log messages were dropped, the log file could not keep up')
+        with self._write_lock:
+            try:
+                self._rotate()
+                os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+                with open(self.file_path, 'a', encoding='utf-8') as log_file:
+                    log_file.write('\n'.join(lines) + '\n')
+            except OSError:
+                # logging must never break the add-in
+                pass
+
+    def close(self):
+        """Stops the background thread after writing what is left."""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._work, name='bulk-export-log', daemon=True)
+        self._thread.start()
+
+    def _work(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            if self.on_flush is not None:
+                self.on_flush()
+
+    def _rotate(self):
+        try:
+            if os.path.getsize(self.file_path) < self.max_bytes:
+                return
+        except OSError:
+            return
+        for index in range(self.backups - 1, 0, -1):
+            older = f'{self.file_path}.{index}'
+            if os.path.exists(older):
+                os.replace(older, f'{self.file_path}.{index + 1}')
+        if self.backups:
+            os.replace(self.file_path, f'{self.file_path}.1')
+        else:
+            os.remove(self.file_path)
+
+    @staticmethod
+    def _format(record):
+        timestamp, level, message = record
+        moment = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+        return f'{moment}.{int(timestamp % 1 * 1000):03d} {LEVEL_NAMES.get(level, level)} {message}'
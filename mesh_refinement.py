@@ -0,0 +1,45 @@
+from __future__ import annotations
+import math
+
+FIDELITY_DRAFT = "draft"
+FIDELITY_FINAL = "final"
+FIDELITIES = [FIDELITY_DRAFT, FIDELITY_FINAL]
+
+# the mesh qualities rows can ask for, files are exported with the default one
+# unless they do
+MESH_QUALITIES = ["low", "medium", "high"]
+MESH_QUALITY_DEFAULT = "medium"
+
+# normal deviation of draft meshes, coarse enough to not refine small fillets
+DRAFT_NORMAL_DEVIATION = math.radians(40)
+
+
+class MeshRefinement:
+    """Custom tessellation settings, lengths in centimeters like Fusion's."""
+
+    def __init__(
+        self, surface_deviation: float, max_edge_length: float, normal_deviation: float
+    ):
+        self.surface_deviation = surface_deviation
+        self.max_edge_length = max_edge_length
+        self.normal_deviation = normal_deviation
+
+
+def draft_refinement(
+    size: tuple[float, float, float], triangle_budget: int
+) -> MeshRefinement:
+    """Picks tessellation settings that give about triangle_budget triangles
+    for a component with the given bounding box size.
+
+    The surface of the bounding box is split into equilateral triangles of the
+    budget, their edge is the maximum edge length. The allowed deviation is
+    the sagitta of such an edge on a curve with a radius of a quarter of the
+    bounding box, so curved faces do not get refined below the edge length.
+    """
+    x, y, z = (max(length, 1e-6) for length in size)
+    area = 2 * (x * y + y * z + z * x)
+    triangle_area = area / max(triangle_budget, 1)
+    edge = math.sqrt(4 * triangle_area / math.sqrt(3))
+    radius = math.sqrt(x * x + y * y + z * z) / 4
+    deviation = edge * edge / (8 * radius)
+    return MeshRefinement(deviation, edge, DRAFT_NORMAL_DEVIATION)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+import hashlib
+import zipfile
+
+try:
+    import numpy as np
+except ImportError:
+    # Fusion does not ship NumPy, without it the export manager is used instead
+    np = None
+
+HAS_NUMPY = np is not None
+
+MESH_FORMATS = ["stl", "obj", "3mf"]
+
+# Fusion works in centimeters, the exported meshes are in millimeters
+CM_TO_MM = 10.0
+
+_STL_DTYPE = None
+if HAS_NUMPY:
+    _STL_DTYPE = np.dtype(
+        [
+            ("normal", "<f4", (3,)),
+            ("vertices", "<f4", (3, 3)),
+            ("attribute", "<u2"),
+        ]
+    )
+
+_3MF_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>
+</Types>
+"""
+_3MF_RELS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>
+</Relationships>
+"""
+_3MF_MODEL_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<model unit="millimeter" xml:lang="en-US" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">
+<resources>
+<object id="1" type="model">
+<mesh>
+<vertices>
+"""
+_3MF_MODEL_FOOTER = """</triangles>
+</mesh>
+</object>
+</resources>
+<build>
+<item objectid="1"/>
+</build>
+</model>
+"""
+
+
+class Mesh:
+    """A triangle mesh as a float array of vertices in millimeters and an int
+    array with three vertex indices per triangle."""
+
+    def __init__(self, vertices, triangles):
+        self.vertices = vertices
+        self.triangles = triangles
+
+    @classmethod
+    def from_fusion(
+        cls, coordinates: list[list[float]], indices: list[list[int]]
+    ) -> Mesh:
+        """Combines the meshes of several bodies, as returned by Fusion's
+        nodeCoordinatesAsFloat and nodeIndices, into a single mesh."""
+        vertices = []
+        triangles = []
+        offset = 0
+        for body_coordinates, body_indices in zip(coordinates, indices):
+            body_vertices = np.asarray(body_coordinates, dtype=np.float32).reshape(
+                -1, 3
+            )
+            vertices.append(body_vertices * CM_TO_MM)
+            triangles.append(
+                np.asarray(body_indices, dtype=np.int64).reshape(-1, 3) + offset
+            )
+            offset += len(body_vertices)
+        if not vertices:
+            return cls(
+                np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.int64)
+            )
+        return cls(np.concatenate(vertices), np.concatenate(triangles))
+
+    def canonical_hash(self, quantum: float):
+        """A hash of the shape of the mesh that does not depend on the order
+        of its vertices and triangles, with the coordinates rounded to the
+        quantum in millimeters, so recomputes of the same geometry match."""
+        coordinates = np.round(self.vertices / quantum).astype(np.int64)
+        if len(coordinates):
+            # vertices numbered in the order of their coordinates
+            unique, inverse = np.unique(coordinates, axis=0, return_inverse=True)
+            triangles = inverse.reshape(-1)[self.triangles]
+        else:
+            unique, triangles = coordinates, self.triangles
+        # rotate every triangle to its lowest rotation, keeping its winding
+        rotations = np.stack(
+            [np.roll(triangles, -shift, axis=1) for shift in range(3)], axis=1
+        )
+        order = rotations[:, :, 0] * max(len(unique), 1) + rotations[:, :, 1]
+        triangles = rotations[np.arange(len(triangles)), np.argmin(order, axis=1)]
+        triangles = triangles[np.lexsort(triangles.T[::-1])]
+        digest = hashlib.sha256(unique.tobytes())
+        digest.update(np.ascontiguousarray(triangles, dtype=np.int64).tobytes())
+        return digest.hexdigest()
+
+
+def write_binary_stl(path: str, mesh: Mesh):
+    corners = mesh.vertices[mesh.triangles]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    np.divide(normals, lengths, out=normals, where=lengths > 0)
+    records = np.zeros(len(corners), dtype=_STL_DTYPE)
+    records["normal"] = normals
+    records["vertices"] = corners
+    with open(path, "wb") as stl_file:
+        stl_file.write(b"Binary STL".ljust(80, b"\0"))
+        stl_file.write(np.uint32(len(records)).tobytes())
+        stl_file.write(records.tobytes())
+
+
+def _format_rows(line_format: str, values) -> str:
+    # a single format operation over the whole array is much faster than
+    # formatting every row on its own
+    return (line_format * len(values)) % tuple(values.ravel().tolist())
+
+
+def write_obj(path: str, mesh: Mesh):
+    with open(path, "w", encoding="ascii") as obj_file:
+        obj_file.write(_format_rows("v %.6f %.6f %.6f\n", mesh.vertices))
+        obj_file.write(_format_rows("f %d %d %d\n", mesh.triangles + 1))
+
+
+def write_3mf(path: str, mesh: Mesh):
+    model = "".join(
+        [
+            _3MF_MODEL_HEADER,
+            _format_rows('<vertex x="%.6f" y="%.6f" z="%.6f"/>\n', mesh.vertices),
+            "</vertices>\n<triangles>\n",
+            _format_rows('<triangle v1="%d" v2="%d" v3="%d"/>\n', mesh.triangles),
+            _3MF_MODEL_FOOTER,
+        ]
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _3MF_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _3MF_RELS)
+        archive.writestr("3D/3dmodel.model", model)
+
+
+MESH_WRITERS = {"stl": write_binary_stl, "obj": write_obj, "3mf": write_3mf}
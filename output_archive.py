@@ -0,0 +1,175 @@
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+import zipfile
+from pathlib import Path
+
+ARCHIVE_INDEX_FILE_NAME = "bulk-export-archive-index.jsonl"
+ARCHIVE_FILE_PATTERN = re.compile(r"bulk-export-(\d+)\.zip$")
+
+ARCHIVE_COMPRESSIONS = {
+    "store": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+
+# the bytes a zip archive needs for a member besides its data, roughly
+_MEMBER_OVERHEAD = 100
+
+
+class OutputArchive:
+    """Moves exported files into numbered zip archives in the output folder
+    as they are finished, instead of leaving them in the folder.
+
+    An archive is closed and the next one started when a file would make it
+    larger than max_bytes. Every file gets a line in an index, mapping its
+    export name, format and parameters to the archive member with its
+    content. Files with the same content key are only stored once, their
+    index lines name the member stored first.
+
+    Members can only be read once their archive was closed, so the files of
+    an archive are handed back as finished when it is closed. Archives of
+    earlier runs are kept, new ones continue their numbering, and later
+    lines of the index replace earlier ones for the same name and format.
+    Several instances sharing an export can write to the same folder, every
+    archive is created by one of them only and the index is appended to a
+    line at a time. Files can be stored from several threads.
+    """
+
+    def __init__(self, folder: str, compression: str, max_bytes: int):
+        if compression not in ARCHIVE_COMPRESSIONS:
+            raise ValueError(f"Unknown archive compression {compression}")
+        self.folder = Path(folder)
+        self.compression = ARCHIVE_COMPRESSIONS[compression]
+        self.max_bytes = max_bytes
+        self.number = max(
+            (
+                int(match.group(1))
+                for match in map(ARCHIVE_FILE_PATTERN.match, os.listdir(folder))
+                if match
+            ),
+            default=0,
+        )
+        self.archives = 0
+        self.files = 0
+        # the archive and member of every content key
+        self.members: dict[str, tuple[str, str]] = {}
+        self._zip: zipfile.ZipFile | None = None
+        self._path = ""
+        self._size = 0
+        # the contexts of the files whose content is in the open archive
+        self._pending: list = []
+        self._lock = threading.Lock()
+        self._index = open(self.folder / ARCHIVE_INDEX_FILE_NAME, "a", encoding="utf-8")
+
+    def store(
+        self,
+        path: str,
+        export_name: str,
+        export_format: str,
+        params: dict[str, str],
+        content_key: str | None,
+        context,
+    ):
+        """Moves a file into the open archive, unless a file with the same
+        content was stored before.
+
+        :returns:
+            The archives that were closed, each with the contexts of its files.
+        """
+        with self._lock:
+            return self._store(
+                path, export_name, export_format, params, content_key, context
+            )
+
+    def _store(
+        self,
+        path: str,
+        export_name: str,
+        export_format: str,
+        params: dict[str, str],
+        content_key: str | None,
+        context,
+    ):
+        closed = []
+        location = self.members.get(content_key) if content_key else None
+        if location is None:
+            size = os.path.getsize(path)
+            if self._zip is not None and self._size + size > self.max_bytes:
+                closed.append(self._close())
+            if self._zip is None:
+                self._open()
+            member = os.path.basename(path)
+            self._zip.write(path, member)
+            self._size += self._zip.getinfo(member).compress_size
+            self._size += _MEMBER_OVERHEAD + len(member)
+            location = (os.path.relpath(self._path, self.folder), member)
+            if content_key:
+                self.members[content_key] = location
+        os.remove(path)
+        return closed + self._add(location, export_name, export_format, params, context)
+
+    def _add(
+        self,
+        location: tuple[str, str],
+        export_name: str,
+        export_format: str,
+        params: dict[str, str],
+        context,
+    ):
+        archive, member = location
+        self._index.write(
+            json.dumps(
+                {
+                    "name": export_name,
+                    "format": export_format,
+                    "params": params,
+                    "archive": archive,
+                    "member": member,
+                }
+            )
+            + "\n"
+        )
+        # a whole line per write, so the lines of other instances never end
+        # up in the middle of it
+        self._index.flush()
+        self.files += 1
+        archive_path = str(self.folder / archive)
+        if self._zip is not None and archive_path == self._path:
+            self._pending.append(context)
+            return []
+        return [(archive_path, [context])]
+
+    def _open(self):
+        while True:
+            self.number += 1
+            self._path = str(self.folder / f"bulk-export-{self.number:04d}.zip")
+            try:
+                self._zip = zipfile.ZipFile(self._path, "x", self.compression)
+                break
+            except FileExistsError:
+                # another instance sharing the export took this number
+                continue
+        self._size = 0
+        self.archives += 1
+
+    def _close(self):
+        self._zip.close()
+        self._zip = None
+        closed = (self._path, self._pending)
+        self._pending = []
+        return closed
+
+    def close(self):
+        """Closes the open archive and the index.
+
+        :returns:
+            The archives that were closed, each with the contexts of its files.
+        """
+        with self._lock:
+            closed = [self._close()] if self._zip is not None else []
+            self._index.close()
+        return closed
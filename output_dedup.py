@@ -0,0 +1,115 @@
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+
+from .file_lock import locked
+
+DUPLICATES_FILE_NAME = "bulk-export-duplicates.json"
+
+DEDUPLICATE_LINK = "link"
+DEDUPLICATE_MANIFEST = "manifest"
+
+
+class OutputDeduplicator:
+    """Keeps a single copy of exported files with the same content.
+
+    Every file is added with a key describing its content. A file with the
+    key of an earlier one is either replaced by a hard link to it, or deleted
+    and listed in a duplicates file mapping its path to the one that was
+    kept. Paths are stored relative to the output folder. Instances sharing
+    an export merge their duplicates into the same file.
+    """
+
+    def __init__(self, folder: str, mode: str):
+        if mode not in (DEDUPLICATE_LINK, DEDUPLICATE_MANIFEST):
+            raise ValueError(f"Unknown deduplication mode {mode}")
+        self.folder = Path(folder)
+        self.path = self.folder / DUPLICATES_FILE_NAME
+        self.mode = mode
+        self.originals: dict[str, str] = {}
+        self.duplicates: dict[str, str] = {}
+        # the duplicates dropped since the last save, which other instances
+        # may still have in the file
+        self.removed: set[str] = set()
+        self.saved_bytes = 0
+
+    def load(self):
+        """Reads the duplicates of earlier runs whose original still exists."""
+        self.duplicates = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as duplicates_file:
+                duplicates = json.load(duplicates_file)["duplicates"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+        return {
+            duplicate: original
+            for duplicate, original in duplicates.items()
+            if (self.folder / original).exists()
+        }
+
+    def add(self, content_key: str, path: str):
+        """Registers an exported file.
+
+        Returns the path the content can be found at, which is the original
+        file if the content was stored in the duplicates file only.
+        """
+        relative_path = os.path.relpath(path, self.folder)
+        self._remove(relative_path)
+        original = self.originals.get(content_key)
+        if original is None or original == relative_path:
+            self.originals[content_key] = relative_path
+            return path
+        original_path = str(self.folder / original)
+        if not os.path.exists(original_path):
+            self.originals[content_key] = relative_path
+            return path
+        size = os.path.getsize(path)
+        if self.mode == DEDUPLICATE_LINK:
+            temp_path = path + ".partial"
+            try:
+                os.link(original_path, temp_path)
+            except OSError:
+                # the file system cannot link, keep the copy
+                return path
+            os.replace(temp_path, path)
+            self.saved_bytes += size
+            return path
+        os.remove(path)
+        self.duplicates[relative_path] = original
+        self.removed.discard(relative_path)
+        self.saved_bytes += size
+        return original_path
+
+    def forget(self, path: str):
+        """Drops a file that is going to be deleted.
+
+        Returns False if duplicates are stored as this file, so it has to be
+        kept.
+        """
+        relative_path = os.path.relpath(path, self.folder)
+        self._remove(relative_path)
+        return relative_path not in self.duplicates.values()
+
+    def _remove(self, relative_path: str):
+        if self.duplicates.pop(relative_path, None) is not None:
+            self.removed.add(relative_path)
+
+    def save(self):
+        """Merges the duplicates into the file, keeping the ones other
+        instances saved in the meantime."""
+        if self.mode != DEDUPLICATE_MANIFEST:
+            return
+        with locked(self.path):
+            duplicates = self._read()
+            for relative_path in self.removed:
+                duplicates.pop(relative_path, None)
+            duplicates.update(self.duplicates)
+            temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(temp_path, "w", encoding="utf-8") as duplicates_file:
+                json.dump({"duplicates": duplicates}, duplicates_file, indent=2)
+            os.replace(temp_path, self.path)
+        self.duplicates = duplicates
+        self.removed.clear()
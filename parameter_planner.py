@@ -0,0 +1,97 @@
+from __future__ import annotations
+import re
+from functools import lru_cache
+
+# Tokens of a Fusion expression: quoted text, numbers (so that the exponent
+# of "1e3" is not mistaken for a name) and identifiers.
+_TOKEN_PATTERN = re.compile(
+    r"'[^']*'|\"[^\"]*\"|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|([^\W\d]\w*)"
+)
+
+
+@lru_cache(maxsize=4096)
+def find_references(expression: str) -> frozenset[str]:
+    """Returns the names in the expression that may refer to other parameters,
+    which includes the names of units, functions and constants. Only the ones
+    naming parameters of the model matter for the order."""
+    names = set()
+    for match in _TOKEN_PATTERN.finditer(expression):
+        name = match.group(1)
+        if name is not None:
+            names.add(name)
+    return frozenset(names)
+
+
+class ParameterPlan:
+    def __init__(
+        self,
+        order: list[str],
+        unknown: list[str],
+        cycles: list[list[str]],
+    ):
+        self.order = order
+        self.unknown = unknown
+        self.cycles = cycles
+
+
+def plan_parameters(
+    model_expressions: dict[str, str], overrides: dict[str, str]
+) -> ParameterPlan:
+    """Orders the overridden parameters so that each one is applied after all
+    the parameters its new expression depends on.
+
+    Arguments:
+    model_expressions -- The current expression of every parameter in the model.
+    overrides -- The new expressions to apply, by parameter name.
+    """
+    unknown = [name for name in overrides if name not in model_expressions]
+    dependencies: dict[str, list[str]] = {}
+
+    def dependencies_of(name: str):
+        deps = dependencies.get(name)
+        if deps is None:
+            expression = overrides.get(name)
+            if expression is None:
+                expression = model_expressions[name]
+            # other names are units, functions or typos, which Fusion checks
+            # when the expression is set
+            deps = [
+                ref for ref in find_references(expression) if ref in model_expressions
+            ]
+            dependencies[name] = deps
+        return deps
+
+    # Iterative depth first search, so that long dependency chains do not hit
+    # the recursion limit. Parameters are emitted after all their dependencies.
+    visiting, done = 1, 2
+    state: dict[str, int] = {}
+    order: list[str] = []
+    cyclic: set[str] = set()
+    cycles: list[list[str]] = []
+    for root in overrides:
+        if root not in model_expressions or root in state:
+            continue
+        state[root] = visiting
+        path = [root]
+        stack = [iter(dependencies_of(root))]
+        while stack:
+            dep = next(stack[-1], None)
+            if dep is None:
+                stack.pop()
+                name = path.pop()
+                state[name] = done
+                if name in overrides:
+                    order.append(name)
+                continue
+            dep_state = state.get(dep)
+            if dep_state is None:
+                state[dep] = visiting
+                path.append(dep)
+                stack.append(iter(dependencies_of(dep)))
+            elif dep_state == visiting:
+                cycle = path[path.index(dep) :]
+                cycles.append(cycle)
+                cyclic.update(name for name in cycle if name in overrides)
+
+    order = [name for name in order if name not in cyclic]
+    return ParameterPlan(order, unknown, cycles)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+from typing import Callable, Iterable
+
+from .export_report import ExportReport
+from .mesh_refinement import FIDELITIES, MESH_QUALITIES
+from .parameter_planner import plan_parameters
+
+
+def validate_variations(
+    variations: Iterable,
+    expressions: dict[str, str],
+    units: dict[str, str],
+    is_valid_expression: Callable[[str, str], bool],
+    known_formats: list[str] | None = None,
+):
+    """Checks every variation without changing the model, so problems are found
+    before the first export instead of hours into a run.
+
+    Arguments:
+    variations -- The variations that will be exported.
+    expressions -- The current expression of every parameter in the model.
+    units -- The unit of every parameter in the model.
+    is_valid_expression -- Checks if an expression can be evaluated in a unit.
+    known_formats -- The formats rows can ask for, None to not check them.
+
+    :returns:
+        An ExportReport with all the problems found and the number of variations.
+    """
+    report = ExportReport()
+    checked_headers: set[str] = set()
+    valid_cells: dict[tuple[str, str], bool] = {}
+    export_names: set[str] = set()
+    count = 0
+    for variation in variations:
+        count += 1
+        name = variation.output_filename
+        if not name:
+            report.add(f"row {count}", "the export name is empty")
+        elif name in export_names:
+            report.add(name, "the export name is used more than once")
+        export_names.add(name)
+
+        fidelity = getattr(variation, "fidelity", "")
+        if fidelity and fidelity not in FIDELITIES:
+            report.add(
+                name,
+                f"the fidelity {fidelity} is not one of {', '.join(FIDELITIES)}",
+                status="invalid",
+            )
+        if known_formats is not None:
+            for export_format in getattr(variation, "formats", []):
+                if export_format not in known_formats:
+                    report.add(
+                        name,
+                        f"the format {export_format} is not one of {', '.join(known_formats)}",
+                        status="invalid",
+                    )
+        quality = getattr(variation, "mesh_quality", "")
+        if quality and quality not in MESH_QUALITIES:
+            report.add(
+                name,
+                f"the mesh quality {quality} is not one of {', '.join(MESH_QUALITIES)}",
+                status="invalid",
+            )
+
+        params = variation.params
+        for param_name, expression in params.items():
+            if param_name not in expressions:
+                if param_name not in checked_headers:
+                    checked_headers.add(param_name)
+                    report.add(
+                        "header",
+                        "is not a parameter in the model",
+                        parameter=param_name,
+                    )
+                continue
+            key = (expression, units[param_name])
+            valid = valid_cells.get(key)
+            if valid is None:
+                valid = valid_cells[key] = is_valid_expression(*key)
+            if not valid:
+                report.add(
+                    name,
+                    f"{expression} is not a valid expression in {units[param_name] or 'this unit'}",
+                    parameter=param_name,
+                    status="invalid",
+                )
+
+        plan = plan_parameters(expressions, params)
+        for cycle in plan.cycles:
+            report.add(
+                name,
+                f"circular reference: {' -> '.join(cycle + cycle[:1])}",
+                status="circular",
+            )
+    return report, count
@@ -0,0 +1,67 @@
+from __future__ import annotations
+import os
+import threading
+from typing import Callable, Iterable
+
+
+def file_signature(path: str):
+    """Changes whenever the file is written, None if it cannot be read."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def variant_fingerprints(variations: Iterable):
+    """What every variant is exported from, by export name."""
+    return {
+        variation.output_filename: tuple(sorted(zip(variation.columns, variation.row)))
+        for variation in variations
+    }
+
+
+def diff_variants(old: dict[str, tuple], new: dict[str, tuple]):
+    """Compares the fingerprints of two versions of a parameter file.
+
+    :returns:
+        The export names of the added, the changed and the removed variants.
+    """
+    added = [name for name in new if name not in old]
+    changed = [name for name in new if name in old and old[name] != new[name]]
+    removed = [name for name in old if name not in new]
+    return added, changed, removed
+
+
+class FileWatcher:
+    """Calls changed from a background thread while the file differs from the
+    version that was handled last.
+
+    A change is only reported once the file stayed the same for an interval,
+    so a file that is still being saved is not read half written. The
+    handler sets handled to the signature of the version it read.
+    """
+
+    def __init__(self, path: str, changed: Callable[[], None], interval: float):
+        self.path = path
+        self.changed = changed
+        self.interval = interval
+        self.handled = file_signature(path)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._work, name="bulk-export-watch", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _work(self):
+        last = self.handled
+        while not self._stopped.wait(self.interval):
+            current = file_signature(self.path)
+            if current is not None and current == last and current != self.handled:
+                self.changed()
+            last = current
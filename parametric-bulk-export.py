@@ -1,10 +1,63 @@
 from __future__ import annotations
 from .lib import fusion360utils as futil
+from . import config, timing
+from .io_pipeline import COMPRESSION_SUFFIXES, OutputPipeline, OutputTransfer
+from .job_file import (
+    JOB_FINISHED,
+    JOB_REJECTED,
+    JOB_STOPPED,
+    JobFile,
+    JobFileError,
+    JobFolderWatcher,
+    pending_jobs,
+    result_path,
+    write_result,
+)
+from .mesh_refinement import (
+    FIDELITIES,
+    FIDELITY_DRAFT,
+    FIDELITY_FINAL,
+    MESH_QUALITY_DEFAULT,
+    MeshRefinement,
+    draft_refinement,
+)
+from .mesh_writer import HAS_NUMPY, MESH_FORMATS, MESH_WRITERS, Mesh
+from .output_archive import OutputArchive
+from .output_dedup import DEDUPLICATE_MANIFEST, OutputDeduplicator
+from .parameter_planner import plan_parameters
+from .export_cache import ExportManifest, variant_key
+from .export_report import (
+    ERROR_POLICIES,
+    ExportReport,
+    POLICY_ABORT,
+    POLICY_CONTINUE,
+    REPORT_FILE_NAME,
+)
+from .parameter_validation import validate_variations
+from .parameter_watch import (
+    FileWatcher,
+    diff_variants,
+    file_signature,
+    variant_fingerprints,
+)
+from .run_journal import RunJournal
+from .shard_queue import QueueBusyError, ShardQueue, default_worker_id
+from .sweep_spec import SweepSpec, SweepSpecError
+from .variant_scheduler import schedule_variations, total_cost
 import adsk.core
 import adsk.fusion
 import traceback
+import contextlib
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import time
 import csv
+import sys
 from pathlib import Path
+from typing import Callable, Container, Iterable, Iterator
 
 BULK_EXPORT_COMMAND_NAME = "Parametric Export"
 BULK_EXPORT_COMMAND_DESCRIPTION = "Bulk export meshes, changing selected parameters."
@@ -16,7 +69,37 @@ TARGET_PANEL = "SolidScriptsAddinsPanel"
 CSV_EXPORT_FLAG = "Activate Export"
 CSV_EXPORT_NAME = "Export Name"
 CSV_SPECIAL_HEADERS = [CSV_EXPORT_NAME, CSV_EXPORT_FLAG]
+# columns a parameter file may have, but that are not written to new files
+CSV_FIDELITY = "Fidelity"
+CSV_FORMATS = "Formats"
+CSV_MESH_QUALITY = "Mesh Quality"
+CSV_OPTIONAL_HEADERS = [CSV_FIDELITY, CSV_FORMATS, CSV_MESH_QUALITY]
+LOAD_CSV_ITEM = "Load CSV"
+JOIN_QUEUE_ITEM = "Join shared export"
+# exported files get this added to their name until they are complete
+PARTIAL_NAME_SUFFIX = ".partial"
+# how many variants to export between saving the export cache manifest
+CACHE_SAVE_INTERVAL = 50
+# the export runs a variant at a time whenever this custom event fires
+EXPORT_TICK_EVENT_ID = f"{BULK_EXPORT_COMMAND_ID}-tick"
+# seconds a tick may keep skipping already exported variants before
+# handing control back to Fusion
+TICK_BUDGET = 0.1
+# fired with the path of a job file to run it without dialogs, also from
+# scripts and other add-ins; without a path it starts the next waiting job
+RUN_JOB_EVENT_ID = f"{BULK_EXPORT_COMMAND_ID}-run-job"
 _handlers: "list[adsk.core.EventHandler]" = []
+_active_job: BulkExportJob | None = None
+# the job files waiting for the running export, and all that were started
+_queued_jobs: list[str] = []
+_started_jobs: set[str] = set()
+_job_watcher: JobFolderWatcher | None = None
+# fired while the parameter file of the last export changed since it was read
+PARAMETER_FILE_CHANGED_EVENT_ID = f"{BULK_EXPORT_COMMAND_ID}-file-changed"
+_parameter_watch: ParameterFileWatch | None = None
+# the model state of documents whose only unsaved changes are the parameters
+# runs changed and restored, by document id
+_restored_states: dict[str, str] = {}
 
 
 class BulkExportCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
@@ -60,8 +143,28 @@ class BulkExportCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             )
             radioButtonGroup.isFullWidth = True
             radioButtonItems = radioButtonGroup.listItems
-            radioButtonItems.add("Load CSV", True)
+            radioButtonItems.add(LOAD_CSV_ITEM, True)
             radioButtonItems.add("Save starting point CSV", False)
+            radioButtonItems.add(JOIN_QUEUE_ITEM, False)
+
+            export_options_group = inputs.addGroupCommandInput(
+                "exportOptions", "Options"
+            )
+            export_options_group.children.addBoolValueInput(
+                "reorderVariantsBool", "Minimize recomputes", True, "", False
+            )
+            export_options_group.children.addBoolValueInput(
+                "resumeRunBool", "Resume previous run", True, "", False
+            )
+            export_options_group.children.addBoolValueInput(
+                "shareRunBool", "Share with other Fusion instances", True, "", False
+            )
+            export_options_group.children.addBoolValueInput(
+                "draftBool", "Draft quality", True, "", False
+            )
+            export_options_group.children.addBoolValueInput(
+                "watchBool", "Export changes to the file", True, "", False
+            )
         except Exception:
             if self.ui:
                 self.ui.messageBox(
@@ -104,8 +207,27 @@ class BulkExportCommandExecuteHandler(adsk.core.CommandEventHandler):
             radioButtonGroup: adsk.core.RadioButtonGroupCommandInput = inputs.itemById(
                 "radioImportExport"
             )  # type: ignore
-            is_import = radioButtonGroup.selectedItem.name == "Load CSV"
-            self.do_import_export(is_import, do_stl, do_step, do_obj, do_3mf)
+            if radioButtonGroup.selectedItem.name == JOIN_QUEUE_ITEM:
+                self.join_shared_export()
+                return
+            is_import = radioButtonGroup.selectedItem.name == LOAD_CSV_ITEM
+            reorder = bool(inputs.itemById("reorderVariantsBool").value)  # type: ignore
+            resume = bool(inputs.itemById("resumeRunBool").value)  # type: ignore
+            share = bool(inputs.itemById("shareRunBool").value)  # type: ignore
+            draft = bool(inputs.itemById("draftBool").value)  # type: ignore
+            watch = bool(inputs.itemById("watchBool").value)  # type: ignore
+            self.do_import_export(
+                is_import,
+                do_stl,
+                do_step,
+                do_obj,
+                do_3mf,
+                reorder,
+                resume,
+                share,
+                draft,
+                watch,
+            )
         except Exception:
             if self.ui:
                 self.ui.messageBox(
@@ -113,7 +235,17 @@ class BulkExportCommandExecuteHandler(adsk.core.CommandEventHandler):
                 )
 
     def do_import_export(
-        self, isImport: bool, do_stl: bool, do_step: bool, do_obj: bool, do_3mf: bool
+        self,
+        isImport: bool,
+        do_stl: bool,
+        do_step: bool,
+        do_obj: bool,
+        do_3mf: bool,
+        reorder: bool = False,
+        resume: bool = False,
+        share: bool = False,
+        draft: bool = False,
+        watch: bool = False,
     ):
         try:
             fileDialog = self.ui.createFileDialog()
@@ -121,7 +253,10 @@ class BulkExportCommandExecuteHandler(adsk.core.CommandEventHandler):
             fileDialog.title = (
                 "Get the file to read from or the file to save the parameters to"
             )
-            fileDialog.filter = "Text files (*.csv)"
+            if isImport:
+                fileDialog.filter = "Parameter files (*.csv *.json);;Text files (*.csv);;Sweep files (*.json)"
+            else:
+                fileDialog.filter = "Text files (*.csv)"
             fileDialog.filterIndex = 0
             if isImport:
                 dialogResult = fileDialog.showOpen()
@@ -135,7 +270,18 @@ class BulkExportCommandExecuteHandler(adsk.core.CommandEventHandler):
 
             # if isImport is true read the parameters from a file
             if isImport:
-                self.export(filename, do_stl, do_step, do_obj, do_3mf)
+                self.export(
+                    filename,
+                    do_stl,
+                    do_step,
+                    do_obj,
+                    do_3mf,
+                    reorder,
+                    resume,
+                    share,
+                    draft,
+                    watch,
+                )
             else:
                 write_parameters_to_file(filename)
 
@@ -144,44 +290,1273 @@ class BulkExportCommandExecuteHandler(adsk.core.CommandEventHandler):
                 self.ui.messageBox("Failed:\n{}".format(traceback.format_exc()))
 
     def export(
-        self, filePath: str, do_stl: bool, do_step: bool, do_obj: bool, do_3mf: bool
+        self,
+        filePath: str,
+        do_stl: bool,
+        do_step: bool,
+        do_obj: bool,
+        do_3mf: bool,
+        reorder: bool = False,
+        resume: bool = False,
+        share: bool = False,
+        draft: bool = False,
+        watch: bool = False,
     ):
-        design = adsk.fusion.Design.cast(self.app.activeProduct)  # type: ignore
+        global _parameter_watch
+        if _active_job is not None:
+            self.ui.messageBox("An export is already running")
+            return
         output_folder = get_output_folder()
         if output_folder is None:
             return
-        variations = read_parameters_from_file(filePath)
-        # TODO: Take a snapshot of the current state of the model
-        for variation in variations:
-            if variation.should_export:
-                # named_vals = adsk.core.NamedValues.create()
-                # export_settings = ExportSettings(
-                #     output_folder=output_folder,
-                #     variation=variation,
-                #     do_stl=do_stl,
-                #     do_step=do_step,
-                #     do_obj=do_obj,
-                #     do_3mf=do_3mf,
-                # )
-                # named_vals.add(
-                #     "export_settings",
-                #     adsk.core.ValueInput.createByString("test string"),
-                # )
-                # self.ui.commandDefinitions.itemById(VARIANT_EXPORT_COMMAND_ID).execute(
-                #     named_vals
-                # )
-                apply_parameters(self.ui, design, variation)
-                export_meshes(
-                    output_folder,
-                    variation.output_filename,
-                    design.activeComponent,
-                    do_stl,
-                    do_step,
-                    do_obj,
-                    do_3mf,
+        # a new export ends watching the file of the previous one
+        if _parameter_watch is not None:
+            _parameter_watch.stop()
+            _parameter_watch = None
+        formats = selected_formats(do_stl, do_step, do_obj, do_3mf)
+        fidelity = FIDELITY_DRAFT if draft else FIDELITY_FINAL
+        problem = start_export(
+            self.app,
+            filePath,
+            output_folder,
+            formats,
+            reorder,
+            resume,
+            share,
+            fidelity,
+        )
+        if problem is not None:
+            self.ui.messageBox(problem)
+            return
+        if watch:
+            _parameter_watch = ParameterFileWatch(
+                self.app, filePath, output_folder, formats, fidelity
+            )
+            _parameter_watch.start()
+
+    def join_shared_export(self):
+        """Helps with an export another Fusion instance shared in the output
+        folder, using the formats chosen there."""
+        if _active_job is not None:
+            self.ui.messageBox("An export is already running")
+            return
+        output_folder = get_output_folder()
+        if output_folder is None:
+            return
+        problem = join_shared_export(self.app, output_folder)
+        if problem is not None:
+            self.ui.messageBox(problem)
+
+
+def start_export(
+    app: adsk.core.Application,
+    file_path: str,
+    output_folder: str,
+    formats: list[str],
+    reorder: bool = False,
+    resume: bool = False,
+    share: bool = False,
+    fidelity: str = FIDELITY_FINAL,
+    on_finish: Callable[[dict], None] | None = None,
+):
+    """Checks the variations of a parameter file and starts exporting them.
+
+    Arguments:
+    on_finish -- Gets the summary of the run once it ended. If given, the run
+                 shows no dialogs at all.
+
+    :returns:
+        None if the export was started, else what kept it from starting.
+    """
+    design = adsk.fusion.Design.cast(app.activeProduct)  # type: ignore
+    # the file is streamed, once to check it and once more to export it
+    try:
+        count, problem = validate_export(
+            design, output_folder, read_variations(file_path)
+        )
+    except SweepSpecError as e:
+        return f"Invalid sweep file {Path(file_path).name}:\n{e}"
+    if problem is not None:
+        return problem
+    variations = read_variations(file_path)
+    if reorder:
+        # reordering needs all rows in memory; the file names come from
+        # each row, so the order does not change the outputs
+        rows = list(variations)
+        names = {name for variation in rows[:1] for name in variation.params}
+        weights = parameter_weights(design, names)
+        futil.log(f"Parameter changes before reordering: {total_cost(rows, weights)}")
+        rows = schedule_variations(rows, weights)
+        futil.log(f"Parameter changes after reordering: {total_cost(rows, weights)}")
+        variations = iter(rows)
+    # rows without a fidelity of their own use the one of the run
+    this_run = run_id(app, file_path, formats, fidelity)
+    if share:
+        if count == 0:
+            # a queue without shards has nothing for other instances to join
+            return f"Nothing to export, {Path(file_path).name} has no active variants"
+        queue = ShardQueue(
+            output_folder, default_worker_id(), config.SHARD_LEASE_TIMEOUT
+        )
+        if (
+            resume
+            and queue.exists()
+            and queue.is_compatible()
+            and queue.info()["settings"]["run"] == this_run
+        ):
+            futil.log("Joining the shared export of this file that is still queued")
+        else:
+            try:
+                create_shard_queue(
+                    queue,
+                    variations,
+                    {
+                        "run": this_run,
+                        "formats": formats,
+                        "fidelity": fidelity,
+                        "document": data_file_id(app),
+                    },
+                )
+            except QueueBusyError as e:
+                return (
+                    f"An export is still shared in this folder.\n{e}\n\n"
+                    f"Join it, or wait until it has finished."
+                )
+        start_shard_worker(app, design, output_folder, queue, on_finish)
+        return None
+    journal = RunJournal(output_folder, this_run)
+    if journal.open(resume):
+        for path in journal.remove_partial_files():
+            futil.log(f"Removed partially written {path}")
+    elif resume:
+        futil.log("No previous run of this file to resume, starting over")
+    start_job(
+        app,
+        design,
+        output_folder,
+        variations,
+        count,
+        formats,
+        journal,
+        fidelity,
+        on_finish=on_finish,
+    )
+    return None
+
+
+def join_shared_export(
+    app: adsk.core.Application,
+    output_folder: str,
+    on_finish: Callable[[dict], None] | None = None,
+):
+    """Starts working on the export shared in the output folder.
+
+    :returns:
+        None if the export was joined, else what kept it from joining.
+    """
+    problem = error_policy_problem()
+    if problem is not None:
+        return problem
+    design = adsk.fusion.Design.cast(app.activeProduct)  # type: ignore
+    queue = ShardQueue(output_folder, default_worker_id(), config.SHARD_LEASE_TIMEOUT)
+    if not queue.exists():
+        return "No export was shared in this folder"
+    if not queue.is_compatible():
+        return (
+            "The export shared in this folder was started by another version "
+            "of the add-in"
+        )
+    if queue.info()["settings"]["document"] != data_file_id(app):
+        return "The export shared in this folder is of a different document"
+    start_shard_worker(app, design, output_folder, queue, on_finish)
+    return None
+
+
+def start_shard_worker(
+    app: adsk.core.Application,
+    design: adsk.fusion.Design,
+    output_folder: str,
+    queue: ShardQueue,
+    on_finish: Callable[[dict], None] | None = None,
+):
+    info = queue.info()
+    # every instance keeps its own journal and report, the queue already
+    # knows which variants are done
+    journal = RunJournal(
+        output_folder,
+        info["settings"]["run"],
+        queue.worker_path("journal.jsonl"),
+    )
+    journal.open(resume=False)
+    job: BulkExportJob | None = None
+
+    def flush():
+        # only called by the running job, once it asks for the next variant
+        job.flush_outputs()
+
+    job = start_job(
+        app,
+        design,
+        output_folder,
+        shard_variations(queue, flush),
+        info["variants"],
+        info["settings"]["formats"],
+        journal,
+        info["settings"].get("fidelity", FIDELITY_FINAL),
+        queue.worker_path(REPORT_FILE_NAME),
+        on_finish,
+        queue.progress,
+    )
+
+
+def start_job(
+    app: adsk.core.Application,
+    design: adsk.fusion.Design,
+    output_folder: str,
+    variations: Iterator[ParameterList],
+    count: int,
+    formats: list[str],
+    journal: RunJournal,
+    fidelity: str = FIDELITY_FINAL,
+    report_path: str | None = None,
+    on_finish: Callable[[dict], None] | None = None,
+    shared_progress: Callable[[], tuple[int, int]] | None = None,
+):
+    version = model_state(app, design)
+    cache = None
+    if config.EXPORT_CACHE:
+        if version is None:
+            futil.log("Export cache disabled: the document was never saved")
+        elif (
+            app.activeDocument.isModified
+            and _restored_states.get(data_file_id(app)) != version
+        ):
+            # the cache keys only know the parameters, files exported before
+            # other unsaved changes would be reused for them. Parameters an
+            # earlier run changed and restored do not count as changes.
+            futil.log("Export cache disabled: the document has unsaved changes")
+        else:
+            cache = ExportManifest(output_folder, config.EXPORT_CACHE_MAX_ENTRIES)
+            cache.load()
+    job = BulkExportJob(
+        app,
+        design,
+        output_folder,
+        variations,
+        count,
+        formats,
+        version,
+        cache,
+        journal,
+        fidelity,
+        report_path,
+        on_finish,
+        shared_progress,
+    )
+    job.start()
+    return job
+
+
+def validate_export(
+    design: adsk.fusion.Design,
+    output_folder: str,
+    variations: Iterable[ParameterList],
+):
+    """Checks all variations before exporting any of them.
+
+    Returns the number of variations, and None or a description of the
+    problems that were found.
+    """
+    problem = error_policy_problem()
+    if problem is not None:
+        return 0, problem
+    state = ParameterState(design)
+    units_manager = design.unitsManager
+
+    def is_valid_expression(expression: str, unit: str):
+        try:
+            return units_manager.isValidExpression(expression, unit)
+        except Exception:
+            # text parameters and the like cannot be checked this way
+            return True
+
+    report, count = validate_variations(
+        variations,
+        state.expressions,
+        {name: param.unit for name, param in state.parameters.items()},
+        is_valid_expression,
+        list(EXPORT_FORMATS),
+    )
+    if not report.problems:
+        return count, None
+    report_path = str(Path(output_folder) / REPORT_FILE_NAME)
+    report.write(report_path, {"status": "Validation failed", "variants": count})
+    return count, (
+        f"Nothing was exported, the parameter file has problems.\n\n"
+        f"{report.describe()}\n\nSee {report_path}"
+    )
+
+
+def error_policy_problem():
+    """Checks the configured error policy before the output folder is touched,
+    not when the first problem needs it.
+
+    :returns:
+        None if it is valid, else why the export cannot start.
+    """
+    if config.ERROR_POLICY in ERROR_POLICIES:
+        return None
+    return (
+        f"Export not started: the error policy {config.ERROR_POLICY} "
+        f"is not one of {', '.join(ERROR_POLICIES)}"
+    )
+
+
+class BulkExportJob:
+    """Exports the variations incrementally, a few at a time whenever Fusion
+    is idle, so the UI stays responsive and the run can be cancelled."""
+
+    def __init__(
+        self,
+        app: adsk.core.Application,
+        design: adsk.fusion.Design,
+        output_folder: str,
+        variations: Iterator[ParameterList],
+        total: int,
+        formats: list[str],
+        version: str | None,
+        cache: ExportManifest | None,
+        journal: RunJournal,
+        fidelity: str = FIDELITY_FINAL,
+        report_path: str | None = None,
+        on_finish: Callable[[dict], None] | None = None,
+        shared_progress: Callable[[], tuple[int, int]] | None = None,
+    ):
+        self.app = app
+        self.ui = app.userInterface
+        self.design = design
+        self.output_folder = output_folder
+        self.variations = variations
+        self.total = total
+        self.formats = formats
+        self.shared_formats = shared_tessellation_formats(formats)
+        self.pipeline: OutputPipeline | None = None
+        if config.BACKGROUND_IO:
+            self.pipeline = OutputPipeline(
+                config.STAGING_FOLDER,
+                config.IO_WORKERS,
+                config.STAGING_MAX_BYTES,
+                config.OUTPUT_COMPRESSION,
+            )
+        self.version = version
+        self.cache = cache
+        self.journal = journal
+        self.fidelity = fidelity
+        self.report_path = report_path or str(Path(output_folder) / REPORT_FILE_NAME)
+        # unattended runs hand their summary to this instead of showing dialogs
+        self.on_finish = on_finish
+        # the finished and all shards of an export shared with other instances
+        self.shared_progress = shared_progress
+        self.state = ParameterState(design)
+        self.archive: OutputArchive | None = None
+        # the parameters of the variants with files still to be archived, and
+        # how many
+        self.archive_variants: dict[str, list] = {}
+        # the user parameters that drive nothing, by the parameter names of the
+        # variants
+        self.irrelevant: dict[frozenset[str], set[str]] = {}
+        # the file of every geometry, and the geometry of the files being
+        # exported
+        self.geometry_outputs: dict[str, str] = {}
+        self.geometry_keys: dict[tuple[str, str], str] = {}
+        self.linked = 0
+        self.deduplicator: OutputDeduplicator | None = None
+        if config.ARCHIVE_OUTPUTS:
+            # the archives store identical files only once themselves
+            self.archive = OutputArchive(
+                output_folder, config.ARCHIVE_COMPRESSION, config.ARCHIVE_MAX_BYTES
+            )
+        elif config.DEDUPLICATE_OUTPUTS:
+            self.deduplicator = OutputDeduplicator(
+                output_folder, config.DEDUPLICATE_OUTPUTS
+            )
+            self.deduplicator.load()
+        self.hash_outputs = self.archive is not None or self.deduplicator is not None
+        self.index = 0
+        self.exported = 0
+        self.failed_assignments = 0
+        self.report = ExportReport()
+        self.abort_reason: str | None = None
+        self.start_time = 0.0
+        self.progress: adsk.core.ProgressDialog | None = None
+
+    def start(self):
+        global _active_job
+        _active_job = self
+        self.start_time = time.perf_counter()
+        if config.RECORD_TIMINGS:
+            timing.start_recording(
+                config.TRACE_MAX_SPANS if config.RECORD_TRACE else 0
+            )
+        if self.on_finish is None:
+            self.progress = self.ui.createProgressDialog()
+            self.progress.isCancelButtonShown = True
+            self.progress.cancelButtonText = "Cancel"
+            self.progress.show(
+                BULK_EXPORT_COMMAND_NAME, "Starting export", 0, self.total, 0
+            )
+        self.app.fireCustomEvent(EXPORT_TICK_EVENT_ID)
+
+    def tick(self):
+        """Exports the next variation that has anything to export.
+
+        Returns True when there is more work left.
+        """
+        try:
+            if self.progress is not None and self.progress.wasCancelled:
+                self.finish("Export cancelled", completed=False)
+                return False
+            deadline = time.perf_counter() + TICK_BUDGET
+            while True:
+                variation = next(self.variations, None)
+                if variation is None:
+                    self.finish(self.finished_status(), completed=True)
+                    return False
+                self.index += 1
+                # variants that are already exported are cheap to skip, so
+                # keep going until one was exported or the tick took too long
+                exported = self.export_variation(variation)
+                if self.abort_reason is not None:
+                    self.finish(self.abort_reason, completed=False)
+                    return False
+                if exported or time.perf_counter() > deadline:
+                    break
+            self.collect_transfers()
+            self.update_progress()
+            return True
+        except Exception:
+            self.finish(f"Export failed:\n{traceback.format_exc()}", completed=False)
+            return False
+
+    def finished_status(self):
+        """The status of a run that went through all of its variants."""
+        failed = len(self.report.failed_variants)
+        if not failed:
+            return "Export finished successfully"
+        status = f"Export finished with problems in {failed} variants"
+        # the error policy only skips variants that had a problem
+        skipped = len(set(self.report.skipped_variants))
+        if skipped:
+            status += f", {skipped} of them were not exported"
+        return status
+
+    def update_progress(self):
+        if self.progress is None:
+            return
+        elapsed = time.perf_counter() - self.start_time
+        per_minute = self.exported / elapsed * 60 if elapsed > 0 else 0.0
+        remaining = self.total - self.index
+        # the rate of actually exported variants is the worst case for the rest
+        eta = remaining / per_minute if per_minute > 0 else None
+        self.progress.progressValue = self.index
+        self.progress.message = (
+            f"Variant {self.index} of {self.total}\n"
+            f"{per_minute:.1f} variants/min, "
+            + (
+                f"about {eta:.0f} min left"
+                if eta is not None
+                else "estimating time left"
+            )
+        )
+        if self.shared_progress is not None:
+            done, shards = self.shared_progress()
+            self.progress.message += (
+                f"\n{done} of {shards} shards finished by all instances"
+            )
+
+    def export_variation(self, variation: ParameterList):
+        """Applies and exports a single variation.
+
+        Returns False if there was nothing to export for it.
+        """
+        fidelity = variation.fidelity or self.fidelity
+        name = output_name(variation.output_filename, fidelity)
+        # rows can ask for their own formats and mesh quality, their
+        # parameters are still only applied once for all of them
+        formats = variation.formats or self.formats
+        # built from the row on every access, so only once per variant
+        params = variation.params
+        shared_formats = shared_tessellation_formats(formats)
+        quality = variation.mesh_quality
+        options = {
+            export_format: self.export_options(
+                export_format, fidelity, shared_formats, quality
+            )
+            for export_format in formats
+        }
+        keys: dict[str, str] = {}
+        pending = [
+            export_format
+            for export_format in formats
+            if not self.journal.is_completed(name, export_format)
+        ]
+        if self.cache is not None:
+            keys = {
+                export_format: variant_key(
+                    self.version,
+                    name,
+                    params,
+                    export_format,
+                    options[export_format],
+                )
+                for export_format in formats
+            }
+            pending = [
+                export_format
+                for export_format in pending
+                if not self.cache.lookup(keys[export_format])
+            ]
+        if config.REUSE_UNCHANGED_GEOMETRY and self.archive is None and pending:
+            # variants differing only in parameters that drive nothing get
+            # the files of the first one that was exported
+            pending = self.reuse_geometry(name, params, pending, options, keys)
+        if self.archive is not None and pending:
+            self.archive_variants[name] = [params, len(pending)]
+        if not pending:
+            return False
+        with timing.span("variant", name):
+            self.export_pending(
+                params,
+                name,
+                fidelity,
+                shared_formats,
+                quality,
+                pending,
+                keys,
+            )
+        return True
+
+    def reuse_geometry(
+        self,
+        name: str,
+        params: dict[str, str],
+        pending: list[str],
+        options: dict[str, dict],
+        keys: dict[str, str],
+    ):
+        """Links the files of a variant with the same geometry to the variant.
+
+        Returns the formats that still have to be exported.
+        """
+        names = frozenset(params)
+        if names not in self.irrelevant:
+            self.irrelevant[names] = irrelevant_parameters(self.design, names)
+            if self.irrelevant[names]:
+                futil.log(
+                    "These parameters do not change the exported component: "
+                    + ", ".join(sorted(self.irrelevant[names]))
+                )
+        irrelevant = self.irrelevant[names]
+        if not irrelevant:
+            return pending
+        geometry = {
+            param: expression
+            for param, expression in params.items()
+            if param not in irrelevant
+        }
+        remaining = []
+        for export_format in pending:
+            geometry_key = variant_key(
+                self.version, "", geometry, export_format, options[export_format]
+            )
+            source = self.geometry_outputs.get(geometry_key)
+            if source is None and geometry_key in self.geometry_keys.values():
+                # waiting for the file to be moved to the output folder is
+                # still much faster than exporting it again
+                self.flush_outputs()
+                source = self.geometry_outputs.get(geometry_key)
+            if source is None or not os.path.exists(source):
+                self.geometry_keys[(name, export_format)] = geometry_key
+                remaining.append(export_format)
+                continue
+            target = self.final_path(name, export_format)
+            self.journal.started(name, export_format, target)
+            try:
+                link_or_copy(source, target)
+            except OSError as e:
+                self.report.add(name, str(e), export_format=export_format)
+                continue
+            self.linked += 1
+            self.journal.done(name, export_format, target)
+            if self.cache is not None:
+                self.cache.record(keys[export_format], name, export_format, [target])
+        return remaining
+
+    def final_path(self, name: str, export_format: str):
+        final_path = export_file_path(self.output_folder, name, export_format)
+        if self.pipeline is not None:
+            final_path = self.pipeline.final_path(final_path)
+        return final_path
+
+    def export_pending(
+        self,
+        params: dict[str, str],
+        name: str,
+        fidelity: str,
+        shared_formats: list[str],
+        quality: str,
+        pending: list[str],
+        keys: dict[str, str],
+    ):
+        failed = [
+            result
+            for result in apply_parameters(self.ui, self.design, params, self.state)
+            if not result.ok
+        ]
+        for result in failed:
+            self.report.add(
+                name,
+                f"could not be set to {result.expression}: {result.message}",
+                parameter=result.name,
+                status=result.status,
+            )
+        self.failed_assignments += len(failed)
+        if failed:
+            # the files do not have the geometry of the parameters
+            for export_format in pending:
+                self.geometry_keys.pop((name, export_format), None)
+            if not self.continue_after_problem(name):
+                return
+        refinement = None
+        if fidelity == FIDELITY_DRAFT:
+            # sized for the variant, so small and large ones get about the
+            # same number of triangles
+            refinement = draft_refinement(
+                component_size(self.design.activeComponent),
+                config.DRAFT_TRIANGLE_BUDGET,
+            )
+        mesh: Mesh | None = None
+        # with background I/O the files are exported to the staging folder and
+        # moved to the output folder while the next variant is recomputed
+        if self.pipeline is not None:
+            export_folder = self.pipeline.staging_folder
+            export_name = name
+        else:
+            # exported under another name and then replacing the file of an
+            # earlier run, which may be hard linked to by other variants and
+            # must not be overwritten in place
+            export_folder = self.output_folder
+            export_name = name + PARTIAL_NAME_SUFFIX
+        mesh_hash: str | None = None
+        # a variant whose every export failed is not counted as exported
+        produced = False
+        for export_format in pending:
+            self.journal.started(
+                name, export_format, self.final_path(name, export_format)
+            )
+            content_key = None
+            try:
+                if export_format in shared_formats:
+                    # tessellate once for all the mesh formats of the variant
+                    if mesh is None:
+                        mesh = tessellate_component(
+                            self.design.activeComponent, refinement, quality
+                        )
+                        if self.hash_outputs:
+                            with timing.span("hash mesh"):
+                                mesh_hash = mesh.canonical_hash(
+                                    config.DEDUPLICATE_QUANTUM
+                                )
+                    path = write_mesh_file(
+                        export_folder, export_name, mesh, export_format
+                    )
+                    if mesh_hash is not None:
+                        content_key = self.content_key(export_format, mesh_hash)
+                else:
+                    path = export_format_file(
+                        export_folder,
+                        export_name,
+                        self.design.activeComponent,
+                        export_format,
+                        refinement,
+                        quality,
+                    )
+            except Exception as e:
+                futil.log(
+                    f"{name}: {export_format} export failed\n{traceback.format_exc()}"
+                )
+                with contextlib.suppress(OSError):
+                    os.remove(
+                        export_file_path(export_folder, export_name, export_format)
+                    )
+                self.report.add(name, str(e), export_format=export_format)
+                self.geometry_keys.pop((name, export_format), None)
+                if self.continue_after_problem(name):
+                    continue
+                return
+            # only cache complete variants, a failed parameter may be
+            # fixed in the model before the next run
+            cache_key = (
+                keys[export_format] if self.cache is not None and not failed else None
+            )
+            if self.pipeline is not None:
+                deliver = None
+                if self.archive is not None:
+                    deliver = self.archiver(name, export_format, cache_key, content_key)
+                self.pipeline.submit(
+                    path,
+                    export_file_path(self.output_folder, name, export_format),
+                    (name, export_format, cache_key, content_key),
+                    deliver,
+                )
+            else:
+                final_path = export_file_path(self.output_folder, name, export_format)
+                os.replace(path, final_path)
+                path = final_path
+                if self.hash_outputs and content_key is None:
+                    content_key = self.content_key(export_format, file_sha256(path))
+                self.file_done(name, export_format, path, cache_key, content_key)
+            produced = True
+        if not produced:
+            return
+        self.exported += 1
+        if self.cache is not None and self.exported % CACHE_SAVE_INTERVAL == 0:
+            self.cache.save()
+
+    def file_done(
+        self,
+        name: str,
+        export_format: str,
+        path: str,
+        cache_key: str | None,
+        content_key: str | None = None,
+    ):
+        if self.archive is not None:
+            self.archive_file(name, export_format, path, cache_key, content_key)
+            return
+        if self.deduplicator is not None and content_key is not None:
+            # the path of the content, which is another variant's for a
+            # duplicate that is only listed in the duplicates file
+            path = self.deduplicator.add(content_key, path)
+        self.journal.done(name, export_format, path)
+        if cache_key is not None:
+            self.cache.record(cache_key, name, export_format, [path])
+        geometry_key = self.geometry_keys.pop((name, export_format), None)
+        if geometry_key is not None:
+            self.geometry_outputs.setdefault(geometry_key, path)
+
+    def archive_file(
+        self,
+        name: str,
+        export_format: str,
+        path: str,
+        cache_key: str | None,
+        content_key: str | None,
+    ):
+        """Moves a finished file into the archive."""
+        self.archive_done(
+            self.archive.store(
+                path,
+                name,
+                export_format,
+                self.archive_params(name),
+                content_key,
+                (name, export_format, cache_key),
+            )
+        )
+
+    def archiver(
+        self,
+        name: str,
+        export_format: str,
+        cache_key: str | None,
+        content_key: str | None,
+    ):
+        """Stores a staged file in the archive on the background I/O thread,
+        instead of moving it to the output folder and reading it back."""
+        params = self.archive_params(name)
+
+        def store(transfer: OutputTransfer):
+            key = content_key or self.content_key(export_format, transfer.sha256)
+            return self.archive.store(
+                transfer.staged_path,
+                name,
+                export_format,
+                params,
+                key,
+                (name, export_format, cache_key),
+            )
+
+        return store
+
+    def archive_params(self, name: str):
+        """The parameters of a variant for the archive index, which are only
+        kept until all of its files were archived."""
+        entry = self.archive_variants.get(name)
+        if entry is None:
+            return {}
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self.archive_variants[name]
+        return entry[0]
+
+    def archive_done(self, closed: list[tuple[str, list]]):
+        """Records the files of closed archives as exported, the files of the
+        archive still being written only count once it is complete."""
+        for archive_path, files in closed:
+            for name, export_format, cache_key in files:
+                self.journal.done(name, export_format, archive_path)
+                if cache_key is not None:
+                    self.cache.record(cache_key, name, export_format, [archive_path])
+
+    def flush_outputs(self):
+        """Waits for the background I/O to finish the files exported so far
+        and records them."""
+        if self.pipeline is not None:
+            self.pipeline.drain()
+        self.collect_transfers()
+
+    def collect_transfers(self):
+        """Records the files the background I/O finished moving."""
+        if self.pipeline is None:
+            return
+        for transfer in self.pipeline.completed():
+            name, export_format, cache_key, content_key = transfer.context
+            if transfer.error is not None:
+                self.report.add(name, transfer.error, export_format=export_format)
+            elif transfer.deliver is not None:
+                self.archive_done(transfer.result)
+            else:
+                if self.hash_outputs and content_key is None:
+                    content_key = self.content_key(export_format, transfer.sha256)
+                self.file_done(
+                    name,
+                    export_format,
+                    transfer.final_path,
+                    cache_key,
+                    content_key,
                 )
-                # TODO: Restore the taken model snapshot from above
-        self.ui.messageBox("Export finished successfully")
+
+    def content_key(self, export_format: str, content_hash: str):
+        options = json.dumps(self.export_options(export_format), sort_keys=True)
+        return f"{export_format}:{options}:{content_hash}"
+
+    def export_options(
+        self,
+        export_format: str,
+        fidelity: str = FIDELITY_FINAL,
+        shared_formats: list[str] | None = None,
+        quality: str = "",
+    ):
+        """The options that change the content of the files of a format, or
+        where they are stored."""
+        if shared_formats is None:
+            shared_formats = self.shared_formats
+        options = {}
+        if fidelity == FIDELITY_DRAFT:
+            options["fidelity"] = fidelity
+            options["triangle_budget"] = config.DRAFT_TRIANGLE_BUDGET
+        elif (
+            quality
+            and quality != MESH_QUALITY_DEFAULT
+            and export_format in MESH_FORMATS
+        ):
+            options["mesh_quality"] = quality
+        if export_format in shared_formats:
+            options["writer"] = "shared tessellation"
+        if self.pipeline is not None and self.pipeline.compression:
+            options["compression"] = self.pipeline.compression
+        if self.archive is not None:
+            # archived files are not in the output folder, a run that does
+            # not archive must export them again
+            options["archive"] = True
+        elif (
+            self.deduplicator is not None
+            and self.deduplicator.mode == DEDUPLICATE_MANIFEST
+        ):
+            # duplicates are only listed, not in the output folder
+            options["deduplicate"] = DEDUPLICATE_MANIFEST
+        return options
+
+    def continue_after_problem(self, name: str):
+        """Applies the error policy to a variant that had a problem.
+
+        Returns True if the variant should still be exported.
+        """
+        if config.ERROR_POLICY == POLICY_CONTINUE:
+            return True
+        self.report.skipped(name)
+        if config.ERROR_POLICY == POLICY_ABORT:
+            self.abort_reason = f"Export aborted because of a problem with {name}"
+        return False
+
+    def restore_model(self):
+        """Sets the parameters the run changed back to the snapshot taken
+        before it changed them, as a single update."""
+        changed = self.state.restore_changes()
+        if not changed:
+            return
+        for result in apply_expressions(
+            self.ui, self.design, changed, self.state, batch=True
+        ):
+            if not result.ok:
+                self.report.add(
+                    "model",
+                    f"could not be restored to {result.expression}: {result.message}",
+                    parameter=result.name,
+                    status=result.status,
+                )
+
+    def output_file_path(self, file_name: str):
+        """Where to write a file about the run, next to its report."""
+        report_path = Path(self.report_path)
+        return str(
+            report_path.with_name(
+                report_path.name[: -len(REPORT_FILE_NAME)] + file_name
+            )
+        )
+
+    def finish(self, status: str, completed: bool):
+        global _active_job
+        if _active_job is self:
+            _active_job = None
+        if self.progress is not None:
+            self.progress.hide()
+        # leave the model as it was before the run, however it ended
+        self.restore_model()
+        restored = model_state(self.app, self.design) == self.version
+        if self.cache is not None and restored:
+            # setting the parameters marked the document as modified, which
+            # must not keep the next run from using the cache
+            _restored_states[data_file_id(self.app)] = self.version
+        # hands an unfinished shard back to the other instances
+        close_variations = getattr(self.variations, "close", None)
+        if close_variations is not None:
+            close_variations()
+        if self.pipeline is not None:
+            self.pipeline.close()
+            self.collect_transfers()
+        if self.archive is not None:
+            self.archive_done(self.archive.close())
+        self.journal.close()
+        if self.cache is not None:
+            self.cache.save()
+        if self.deduplicator is not None:
+            self.deduplicator.save()
+        recorder = timing.stop_recording()
+        elapsed = time.perf_counter() - self.start_time
+        summary = {
+            "status": status.splitlines()[0],
+            "variants": self.total,
+            "exported": self.exported,
+            "skipped_assignments": self.state.skipped,
+            "failed_assignments": self.failed_assignments,
+            "reused_files": self.cache.hits if self.cache is not None else 0,
+            "deduplicated_bytes": (
+                self.deduplicator.saved_bytes if self.deduplicator is not None else 0
+            ),
+            "linked_files": self.linked,
+            "archived_files": self.archive.files if self.archive is not None else 0,
+            "archives": self.archive.archives if self.archive is not None else 0,
+            "seconds": elapsed,
+        }
+        if recorder is not None:
+            if recorder.traced:
+                recorder.write_jsonl(self.output_file_path(timing.TIMINGS_FILE_NAME))
+                recorder.write_chrome_trace(
+                    self.output_file_path(timing.TRACE_FILE_NAME)
+                )
+            summary["timings"] = recorder.summary()
+            futil.log(f"Timings:\n{timing.describe(summary['timings'])}")
+        self.report.write(self.report_path, summary)
+        futil.logger.flush()
+        if self.on_finish is not None:
+            self.on_finish(
+                dict(
+                    summary,
+                    completed=completed,
+                    message=status,
+                    report=self.report_path,
+                    problems=len(self.report.problems),
+                    failed_variants=sorted(self.report.failed_variants),
+                )
+            )
+            return
+        message = (
+            f"{status}\n"
+            f"Exported {self.exported} of {self.total} variants "
+            f"in {elapsed / 60:.1f} min\n"
+            f"Skipped {self.state.skipped} unchanged parameter assignments"
+        )
+        if self.cache is not None:
+            message += f"\nReused {self.cache.hits} previously exported files"
+        if self.linked:
+            message += (
+                f"\nLinked {self.linked} files of variants with the same geometry"
+            )
+        if self.deduplicator is not None and self.deduplicator.saved_bytes:
+            message += (
+                f"\nSaved {self.deduplicator.saved_bytes / 1024 / 1024:.1f} MB "
+                "by keeping identical files once"
+            )
+        if self.archive is not None and self.archive.files:
+            message += (
+                f"\nPacked {self.archive.files} files "
+                f"into {self.archive.archives} archives"
+            )
+        if self.report.problems:
+            message += f"\n\n{self.report.describe()}\n\nSee {self.report_path}"
+        self.ui.messageBox(message)
+
+
+def _on_export_tick(_: adsk.core.CustomEventArgs):
+    if _active_job is not None and _active_job.tick():
+        adsk.core.Application.get().fireCustomEvent(EXPORT_TICK_EVENT_ID)
+
+
+class ParameterFileWatch:
+    """Exports the variants that were added or changed whenever the parameter
+    file of an export is saved, so an edit only waits for the variants it
+    touched."""
+
+    def __init__(
+        self,
+        app: adsk.core.Application,
+        file_path: str,
+        output_folder: str,
+        formats: list[str],
+        fidelity: str,
+    ):
+        self.app = app
+        self.file_path = file_path
+        self.output_folder = output_folder
+        self.formats = formats
+        self.fidelity = fidelity
+        self.run = run_id(app, file_path, formats, fidelity)
+        # the variants as they were last exported
+        self.variants = variant_fingerprints(read_variations(file_path))
+        self.watcher = FileWatcher(
+            file_path,
+            lambda: app.fireCustomEvent(PARAMETER_FILE_CHANGED_EVENT_ID),
+            config.WATCH_INTERVAL,
+        )
+
+    def start(self):
+        self.watcher.start()
+
+    def stop(self):
+        self.watcher.stop()
+
+    def update(self):
+        """Exports what changed since the file was read last."""
+        signature = file_signature(self.file_path)
+        # a change during an export is picked up once it finished
+        if signature == self.watcher.handled or _active_job is not None:
+            return
+        self.watcher.handled = signature
+        try:
+            rows = list(read_variations(self.file_path))
+            variants = variant_fingerprints(rows)
+        except (OSError, ValueError, csv.Error) as e:
+            futil.log(f"Could not read {self.file_path}: {e}")
+            return
+        added, changed, removed = diff_variants(self.variants, variants)
+        if not (added or changed or removed):
+            return
+        futil.log(
+            f"{Path(self.file_path).name} changed: {len(added)} added, "
+            f"{len(changed)} changed and {len(removed)} removed variants"
+        )
+        pending = set(added + changed)
+        rows = [row for row in rows if row.output_filename in pending]
+        design = adsk.fusion.Design.cast(self.app.activeProduct)  # type: ignore
+        count, problem = validate_export(design, self.output_folder, rows)
+        if problem is not None:
+            self.app.userInterface.messageBox(problem)
+            return
+        journal = RunJournal(self.output_folder, self.run)
+        journal.open(resume=True)
+        for name in changed + removed:
+            for fidelity in FIDELITIES:
+                journal.forget(output_name(name, fidelity))
+        if removed and config.WATCH_REMOVE_DELETED_OUTPUTS:
+            remove_outputs(
+                self.output_folder,
+                [
+                    output_name(name, fidelity)
+                    for name in removed
+                    for fidelity in FIDELITIES
+                ],
+                # rows may have had formats of their own
+                list(EXPORT_FORMATS),
+            )
+        if not rows:
+            journal.close()
+            self.variants = variants
+            return
+
+        def finished(summary: dict):
+            # unexported changes are exported with the next change of the file
+            if summary["completed"]:
+                self.variants = variants
+            futil.log(
+                f"Exported {summary['exported']} changed variants "
+                f"in {summary['seconds']:.1f} s"
+            )
+            if summary["problems"]:
+                self.app.userInterface.messageBox(
+                    f"{summary['message']}\n\n{summary['problems']} problems, "
+                    f"see {summary['report']}"
+                )
+
+        start_job(
+            self.app,
+            design,
+            self.output_folder,
+            iter(rows),
+            count,
+            self.formats,
+            journal,
+            self.fidelity,
+            on_finish=finished,
+        )
+
+
+def _on_parameter_file_changed(_: adsk.core.CustomEventArgs):
+    try:
+        if _parameter_watch is not None:
+            _parameter_watch.update()
+    except Exception:
+        futil.handle_error("parameter file changed")
+
+
+def remove_outputs(output_folder: str, names: list[str], formats: list[str]):
+    """Deletes the files of variants, unless other variants' duplicates are
+    stored as them."""
+    deduplicator = None
+    if config.DEDUPLICATE_OUTPUTS:
+        deduplicator = OutputDeduplicator(output_folder, config.DEDUPLICATE_OUTPUTS)
+        deduplicator.load()
+    for name in names:
+        for export_format in formats:
+            for suffix in COMPRESSION_SUFFIXES.values():
+                path = export_file_path(output_folder, name, export_format) + suffix
+                if deduplicator is not None and not deduplicator.forget(path):
+                    futil.log(f"Kept {path}, other variants have the same content")
+                    continue
+                try:
+                    os.remove(path)
+                    futil.log(f"Removed {path}")
+                except FileNotFoundError:
+                    pass
+    if deduplicator is not None:
+        deduplicator.save()
+
+
+def run_job_file(job_path: str, on_finish: Callable[[dict], None] | None = None):
+    """Runs the export a job file describes without showing any dialogs.
+
+    The result of the job is written to its result file and handed to
+    on_finish once the run ended, or right away if it could not be started.
+
+    Returns True if the export was started.
+    """
+    app = adsk.core.Application.get()
+    started = time.time()
+    result_file = result_path(job_path)
+
+    def done(result: dict):
+        result = dict(
+            result,
+            job=str(Path(job_path).resolve()),
+            started=started,
+            finished=time.time(),
+        )
+        try:
+            write_result(result_file, result)
+        except OSError:
+            futil.log(
+                f"Could not write the result of {job_path}:\n{traceback.format_exc()}"
+            )
+        futil.log(f"Job {job_path}: {result['status']}")
+        if on_finish is not None:
+            on_finish(result)
+
+    def finished(summary: dict):
+        done(
+            dict(summary, status=JOB_FINISHED if summary["completed"] else JOB_STOPPED)
+        )
+
+    try:
+        job = JobFile.load(job_path, list(EXPORT_FORMATS))
+        result_file = job.result_path
+        if _active_job is not None:
+            problem = "An export is already running"
+        else:
+            problem = open_job_document(app, job.document)
+        if problem is None:
+            os.makedirs(job.output_folder, exist_ok=True)
+            if job.join:
+                problem = join_shared_export(app, job.output_folder, finished)
+            else:
+                problem = start_export(
+                    app,
+                    job.input,
+                    job.output_folder,
+                    job.formats,
+                    job.reorder,
+                    job.resume,
+                    job.share,
+                    job.fidelity,
+                    finished,
+                )
+    except JobFileError as e:
+        problem = f"Invalid job file: {e}"
+    except Exception:
+        problem = f"The export could not be started:\n{traceback.format_exc()}"
+    if problem is not None:
+        done({"status": JOB_REJECTED, "message": problem})
+        return False
+    return True
+
+
+def open_job_document(app: adsk.core.Application, document_id: str | None):
+    """Makes the document of a job the active one.
+
+    Returns None if it is, else why it could not be opened.
+    """
+    if document_id is None or document_id == data_file_id(app):
+        return None
+    data_file = app.data.findFileById(document_id)
+    if data_file is None:
+        return f"There is no document with the id {document_id}"
+    app.documents.open(data_file, True)
+    return None
+
+
+def start_next_job():
+    """Runs the queued job files, then the ones waiting in the job folder, one
+    at a time."""
+    app = adsk.core.Application.get()
+    while _active_job is None:
+        if not _queued_jobs and config.JOB_FOLDER:
+            _queued_jobs.extend(pending_jobs(config.JOB_FOLDER, _started_jobs))
+        if not _queued_jobs:
+            return
+        job_path = _queued_jobs.pop(0)
+        _started_jobs.add(str(Path(job_path).resolve()))
+        run_job_file(
+            job_path, on_finish=lambda _: app.fireCustomEvent(RUN_JOB_EVENT_ID)
+        )
+
+
+def _on_run_job(args: adsk.core.CustomEventArgs):
+    try:
+        if args.additionalInfo:
+            _queued_jobs.append(args.additionalInfo)
+        start_next_job()
+    except Exception:
+        futil.handle_error("run job")
 
 
 class ExportVariantCommandCreatedEventHandler(adsk.core.CommandCreatedEventHandler):
@@ -282,37 +1657,171 @@ def write_parameters_to_file(filePath: str):
     ui.messageBox("Parameters written to " + partsOfFilePath[-1])
 
 
+class CsvHeader:
+    """The columns of a parameter file, shared by all of its rows."""
+
+    __slots__ = (
+        "names",
+        "param_names",
+        "param_columns",
+        "name_column",
+        "flag_column",
+        "fidelity_column",
+        "formats_column",
+        "mesh_quality_column",
+    )
+
+    def __init__(self, row: list[str]):
+        self.names = tuple(sys.intern(name) for name in row)
+        self.name_column = self.names.index(CSV_EXPORT_NAME)
+        self.flag_column = self.names.index(CSV_EXPORT_FLAG)
+        self.fidelity_column = self.optional_column(CSV_FIDELITY)
+        self.formats_column = self.optional_column(CSV_FORMATS)
+        self.mesh_quality_column = self.optional_column(CSV_MESH_QUALITY)
+        self.param_columns = tuple(
+            column
+            for column, name in enumerate(self.names)
+            if name not in CSV_SPECIAL_HEADERS and name not in CSV_OPTIONAL_HEADERS
+        )
+        self.param_names = tuple(self.names[column] for column in self.param_columns)
+
+    def optional_column(self, name: str):
+        return self.names.index(name) if name in self.names else None
+
+
 class ParameterList:
-    def __init__(self, row: list[str], header: dict[int, str]):
-        values = {name: row[column] for column, name in header.items()}
-        self._export = bool(values[CSV_EXPORT_FLAG])
-        self._export_name = values[CSV_EXPORT_NAME]
-        self.params = {
-            param: value
-            for param, value in values.items()
-            if param not in CSV_SPECIAL_HEADERS
-        }
+    # sweeps can have hundreds of thousands of rows, so every row only keeps
+    # its values and shares the header with all other rows
+    __slots__ = ("_header", "_values")
+
+    def __init__(self, row: list[str], header: CsvHeader):
+        if len(row) < len(header.names):
+            row = row + [""] * (len(header.names) - len(row))
+        self._header = header
+        self._values = tuple(row)
 
     @property
     def should_export(self):
-        return self._export
+        return bool(self._values[self._header.flag_column])
 
     @property
     def output_filename(self):
-        return self._export_name
+        return self._values[self._header.name_column]
+
+    def _optional_value(self, column: int | None):
+        if column is None:
+            return ""
+        return self._values[column].strip().lower()
+
+    @property
+    def fidelity(self):
+        """The fidelity of the row, empty to use the one of the run."""
+        return self._optional_value(self._header.fidelity_column)
+
+    @property
+    def formats(self):
+        """The formats the row asks for, empty to use the ones of the run."""
+        value = self._optional_value(self._header.formats_column)
+        names = value.replace(",", " ").replace(";", " ").split()
+        return list(dict.fromkeys(names))
+
+    @property
+    def mesh_quality(self):
+        """The mesh quality of the row, empty for the default one."""
+        return self._optional_value(self._header.mesh_quality_column)
+
+    @property
+    def columns(self):
+        return self._header.names
+
+    @property
+    def row(self):
+        return self._values
+
+    @property
+    def params(self):
+        values = self._values
+        return dict(
+            zip(
+                self._header.param_names,
+                [values[column] for column in self._header.param_columns],
+            )
+        )
 
 
 def read_parameters_from_file(filePath: str):
-    variations: list[ParameterList] = []
-    with open(filePath) as csvFile:
+    """Reads the rows of the parameter file that should be exported one at a
+    time, so the file never has to fit into memory."""
+    with open(filePath, newline="") as csvFile:
         csvReader = csv.reader(csvFile, dialect=csv.excel)
-        header: dict[int, str] = {}
-        for line, row in enumerate(csvReader):
-            if line == 0:
-                header = {index: name for index, name in enumerate(row)}
+        row = next(csvReader, None)
+        if row is None:
+            return
+        header = CsvHeader(row)
+        for row in csvReader:
+            if len(row) > header.flag_column and row[header.flag_column]:
+                yield ParameterList(row, header)
+
+
+def read_variations(filePath: str):
+    """Streams the variations of a parameter file or a sweep specification."""
+    if Path(filePath).suffix.lower() != ".json":
+        yield from read_parameters_from_file(filePath)
+        return
+    spec = SweepSpec.load(filePath)
+    header = CsvHeader(CSV_SPECIAL_HEADERS + spec.parameter_names)
+    for export_name, expressions in spec.variants():
+        yield ParameterList([export_name, "x"] + expressions, header)
+
+
+def create_shard_queue(
+    queue: ShardQueue, variations: Iterable[ParameterList], settings: dict
+):
+    variations = iter(variations)
+    first = next(variations, None)
+    rows = [] if first is None else itertools.chain([first], variations)
+    return queue.create(
+        list(first.columns) if first is not None else [],
+        (list(variation.row) for variation in rows),
+        config.SHARD_SIZE,
+        settings,
+    )
+
+
+def shard_variations(queue: ShardQueue, flush: Callable[[], None]):
+    """Claims the shards of the queue one after another and yields their
+    variations, until no shard is left to claim.
+
+    Arguments:
+    queue -- The queue to claim shards from.
+    flush -- Finishes writing the files of the variants yielded so far, so a
+             shard is only marked as done once all of its files are written.
+    """
+    # a queue without variants has no columns either
+    header: CsvHeader | None = None
+    while True:
+        shard = queue.claim()
+        if shard is None:
+            return
+        if header is None:
+            header = CsvHeader(queue.info()["columns"])
+        finished = False
+        try:
+            for row in shard.variants:
+                # renewed before every variant, an instance that got stuck for
+                # longer than the lease timeout loses the rest of the shard
+                if not queue.heartbeat(shard):
+                    futil.log(f"Shard {shard.id} was taken over by another instance")
+                    break
+                yield ParameterList(row, header)
+            else:
+                finished = True
+        finally:
+            if finished:
+                flush()
+                queue.complete(shard)
             else:
-                variations.append(ParameterList(row, header))
-    return variations
+                queue.release(shard)
 
 
 def get_output_folder():
@@ -326,108 +1835,466 @@ def get_output_folder():
     return folder_dialog.folder
 
 
-def export_meshes(
+EXPORT_FORMATS = {"stl": ".stl", "step": ".step", "obj": ".obj", "3mf": ".3mf"}
+# the settings of the mesh qualities rows can ask for, for exported meshes and
+# for the shared tessellation
+MESH_REFINEMENT_SETTINGS = {
+    "low": "MeshRefinementLow",
+    "medium": "MeshRefinementMedium",
+    "high": "MeshRefinementHigh",
+}
+TESSELLATION_QUALITIES = {
+    "low": "LowQualityTriangleMesh",
+    "medium": "NormalQualityTriangleMesh",
+    "high": "HighQualityTriangleMesh",
+}
+
+
+def selected_formats(do_stl: bool, do_step: bool, do_obj: bool, do_3mf: bool):
+    selected = {"stl": do_stl, "step": do_step, "obj": do_obj, "3mf": do_3mf}
+    return [export_format for export_format, do in selected.items() if do]
+
+
+def export_file_path(output_folder: str, file_name: str, export_format: str):
+    return str(Path(output_folder) / (file_name + EXPORT_FORMATS[export_format]))
+
+
+def output_name(export_name: str, fidelity: str):
+    """The file name of a variant, drafts get their own files so they never
+    replace the final ones."""
+    if fidelity == FIDELITY_DRAFT:
+        return export_name + config.DRAFT_NAME_SUFFIX
+    return export_name
+
+
+def export_format_file(
     output_folder: str,
     file_name: str,
     component: adsk.fusion.Component,
-    do_stl: bool,
-    do_step: bool,
-    do_obj: bool,
-    do_3mf: bool,
+    export_format: str,
+    refinement: MeshRefinement | None = None,
+    quality: str = "",
 ):
     export_manager = component.parentDesign.exportManager
-    output_path = str(Path(output_folder) / file_name)
-    if do_stl:
-        futil.log("exporting stl")
-        options = export_manager.createSTLExportOptions(component, output_path)
-        export_manager.execute(options)
-    if do_step:
-        futil.log("exporting step")
-        options = export_manager.createSTEPExportOptions(output_path, component)
-        export_manager.execute(options)
-    if do_obj:
-        futil.log("exporting obj")
-        options = export_manager.createOBJExportOptions(component, output_path)
-        export_manager.execute(options)
-    if do_3mf:
-        futil.log("exporting 3mf")
-        options = export_manager.createC3MFExportOptions(component, output_path)
+    output_path = export_file_path(output_folder, file_name, export_format)
+    futil.trace("exporting %s", export_format)
+    with timing.span("export", format=export_format):
+        if export_format == "stl":
+            options = export_manager.createSTLExportOptions(component, output_path)
+        elif export_format == "step":
+            options = export_manager.createSTEPExportOptions(output_path, component)
+        elif export_format == "obj":
+            options = export_manager.createOBJExportOptions(component, output_path)
+        else:
+            options = export_manager.createC3MFExportOptions(component, output_path)
+        if refinement is not None and export_format != "step":
+            options.meshRefinement = (
+                adsk.fusion.MeshRefinementSettings.MeshRefinementCustom  # type: ignore
+            )
+            options.surfaceDeviation = refinement.surface_deviation
+            options.normalDeviation = refinement.normal_deviation
+            options.maximumEdgeLength = refinement.max_edge_length
+        elif quality and export_format != "step":
+            options.meshRefinement = getattr(
+                adsk.fusion.MeshRefinementSettings, MESH_REFINEMENT_SETTINGS[quality]
+            )
         export_manager.execute(options)
+    return output_path
+
+
+def shared_tessellation_formats(formats: list[str]):
+    """The mesh formats to write from a single tessellation of the component
+    instead of exporting each of them separately."""
+    mesh_formats = [
+        export_format for export_format in formats if export_format in MESH_FORMATS
+    ]
+    if not config.SHARED_TESSELLATION or not HAS_NUMPY or len(mesh_formats) < 2:
+        return []
+    return mesh_formats
+
+
+def component_bodies(component: adsk.fusion.Component):
+    bodies = list(component.bRepBodies)
+    for occurrence in component.allOccurrences:
+        bodies += list(occurrence.bRepBodies)
+    return [body for body in bodies if body.isVisible]
+
+
+def component_size(component: adsk.fusion.Component):
+    box = component.boundingBox
+    low, high = box.minPoint, box.maxPoint
+    return (high.x - low.x, high.y - low.y, high.z - low.z)
+
+
+def tessellate_component(
+    component: adsk.fusion.Component,
+    refinement: MeshRefinement | None = None,
+    quality: str = "",
+):
+    coordinates: list[list[float]] = []
+    indices: list[list[int]] = []
+    mesh_quality = getattr(
+        adsk.fusion.TriangleMeshQualityOptions,
+        TESSELLATION_QUALITIES[quality or MESH_QUALITY_DEFAULT],
+    )
+    with timing.span("tessellate"):
+        for body in component_bodies(component):
+            calculator = body.meshManager.createMeshCalculator()
+            calculator.setQuality(mesh_quality)
+            if refinement is not None:
+                calculator.surfaceTolerance = refinement.surface_deviation
+                calculator.maxSideLength = refinement.max_edge_length
+                calculator.maxNormalDeviation = refinement.normal_deviation
+            triangle_mesh = calculator.calculate()
+            coordinates.append(triangle_mesh.nodeCoordinatesAsFloat)
+            indices.append(triangle_mesh.nodeIndices)
+        return Mesh.from_fusion(coordinates, indices)
+
+
+def write_mesh_file(output_folder: str, file_name: str, mesh: Mesh, export_format: str):
+    output_path = export_file_path(output_folder, file_name, export_format)
+    futil.trace("writing %s", export_format)
+    with timing.span("export", format=export_format):
+        MESH_WRITERS[export_format](output_path, mesh)
+    return output_path
+
+
+def file_sha256(path: str):
+    digest = hashlib.sha256()
+    with open(path, "rb") as exported_file:
+        for chunk in iter(lambda: exported_file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_or_copy(source: str, target: str):
+    """Hard links the target to the source, or copies it where the file system
+    cannot link.
+
+    Linked files share their content, which is safe because exported files
+    always replace the file at their path instead of writing into it.
+    """
+    temp_path = target + PARTIAL_NAME_SUFFIX
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    if config.LINK_REUSED_GEOMETRY:
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            shutil.copyfile(source, temp_path)
+    else:
+        shutil.copyfile(source, temp_path)
+    os.replace(temp_path, target)
+
+
+def irrelevant_parameters(design: adsk.fusion.Design, names: Iterable[str]):
+    """The user parameters among the names that no other parameter references,
+    so they drive no feature, if the exported component is not the root
+    component. Parameters of the model always count as driving it."""
+    if design.activeComponent == design.rootComponent:
+        return set()
+    irrelevant = set()
+    for name in names:
+        param = design.userParameters.itemByName(name)
+        if param and len(param.dependentParameters) == 0:
+            irrelevant.add(name)
+    return irrelevant
+
+
+def model_state(app: adsk.core.Application, design: adsk.fusion.Design):
+    """Identifies the active document together with the current expressions of
+    all its parameters, or None if it was never saved.
+
+    Saving the document does not change it, so files exported before saving
+    are still reused after. Changes to anything but the parameters are not
+    part of it.
+    """
+    document = app.activeDocument
+    if document is None or document.dataFile is None:
+        return None
+    expressions = sorted(
+        (param.name, param.expression) for param in design.allParameters
+    )
+    digest = hashlib.sha256(repr(expressions).encode("utf-8")).hexdigest()
+    return f"{document.dataFile.id}:{digest}"
+
+
+def data_file_id(app: adsk.core.Application):
+    document = app.activeDocument
+    return document.dataFile.id if document and document.dataFile else None
+
+
+def run_id(
+    app: adsk.core.Application,
+    file_path: str,
+    formats: list[str],
+    fidelity: str = FIDELITY_FINAL,
+):
+    """Identifies a run so that only the same run can be resumed."""
+    parts = [str(Path(file_path).resolve()), formats, data_file_id(app)]
+    # final runs keep the ids they had before there were draft runs
+    if fidelity != FIDELITY_FINAL:
+        parts.append(fidelity)
+    # the journal of an archiving run, or one only listing duplicates, has
+    # files that are not in the folder
+    if config.ARCHIVE_OUTPUTS:
+        parts.append("archive")
+    elif config.DEDUPLICATE_OUTPUTS == DEDUPLICATE_MANIFEST:
+        parts.append(DEDUPLICATE_MANIFEST)
+    data = repr(parts)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ParameterState:
+    """The expressions of the model's parameters as last seen or set during a run.
+
+    The expressions read when the run starts are the baseline the first
+    variant is compared to. The first time a parameter is changed, its
+    expression from then is kept in the snapshot, so the run can put back
+    exactly the parameters it touched.
+    """
+
+    def __init__(self, design: adsk.fusion.Design):
+        # looking parameters up by name in the design is slow, so index them once
+        self.parameters: dict[str, adsk.fusion.Parameter] = {
+            oParam.name: oParam for oParam in design.allParameters
+        }
+        self.expressions = {
+            name: oParam.expression for name, oParam in self.parameters.items()
+        }
+        self.snapshot: dict[str, str] = {}
+        self.skipped = 0
+
+    def changed(self, params: dict[str, str]):
+        changed = {
+            name: expression
+            for name, expression in params.items()
+            if self.expressions.get(name) != expression
+        }
+        self.skipped += len(params) - len(changed)
+        for name in changed:
+            if name in self.expressions:
+                self.snapshot.setdefault(name, self.expressions[name])
+        return changed
+
+    def restore_changes(self):
+        """The expressions that put the changed parameters back to the snapshot."""
+        return {
+            name: expression
+            for name, expression in self.snapshot.items()
+            if self.expressions.get(name) != expression
+        }
+
+
+def _timeline_index(entity) -> int | None:
+    # sketch dimensions live in a sketch, everything else that can own a
+    # parameter is a timeline object itself
+    while entity is not None:
+        timeline_object = getattr(entity, "timelineObject", None)
+        if timeline_object is not None:
+            return timeline_object.index
+        entity = getattr(entity, "parentSketch", None)
+    return None
+
+
+def parameter_weights(design: adsk.fusion.Design, names: set[str]):
+    """Weights every parameter by how early in the timeline the first feature
+    it drives is, as changing those recomputes most of the design."""
+    timeline_count = max(design.timeline.count, 1)
+    weights: dict[str, float] = {}
+    for name in names:
+        param = design.allParameters.itemByName(name)
+        if not param:
+            continue
+        earliest = None
+        pending = [param]
+        seen: set[str] = set()
+        while pending:
+            current = pending.pop()
+            if current.name in seen:
+                continue
+            seen.add(current.name)
+            try:
+                index = _timeline_index(getattr(current, "createdBy", None))
+            except Exception:
+                index = None
+            if index is not None and (earliest is None or index < earliest):
+                earliest = index
+            pending.extend(current.dependentParameters)
+        if earliest is not None:
+            weights[name] = 1.0 + (timeline_count - earliest) / timeline_count
+    return weights
+
+
+class ParameterUpdateResult:
+    APPLIED = "applied"
+    UNKNOWN = "unknown"
+    CIRCULAR = "circular"
+    FAILED = "failed"
+
+    def __init__(self, name: str, expression: str, status: str, message: str = ""):
+        self.name = name
+        self.expression = expression
+        self.status = status
+        self.message = message
+
+    @property
+    def ok(self):
+        return self.status == ParameterUpdateResult.APPLIED
 
 
 def apply_parameters(
-    ui: adsk.core.UserInterface, design: adsk.fusion.Design, params: ParameterList
+    ui: adsk.core.UserInterface,
+    design: adsk.fusion.Design,
+    params: ParameterList | dict[str, str],
+    state: ParameterState | None = None,
+):
+    if not isinstance(params, dict):
+        params = params.params
+    if state is None:
+        state = ParameterState(design)
+    with timing.span("apply_parameters"):
+        # only touch the parameters that differ from what the model already has
+        return apply_expressions(ui, design, state.changed(params), state)
+
+
+def apply_expressions(
+    ui: adsk.core.UserInterface,
+    design: adsk.fusion.Design,
+    changed: dict[str, str],
+    state: ParameterState,
+    batch: bool | None = None,
+):
+    """Sets the parameters to the expressions in an order that works.
+
+    Arguments:
+    batch -- Whether to apply all of them as a single change, by default
+             config.BATCH_PARAMETER_UPDATES decides.
+    """
+    if batch is None:
+        batch = config.BATCH_PARAMETER_UPDATES
+    # work out a single order in which every parameter can be applied
+    # instead of retrying failed ones until they stick
+    plan = plan_parameters(state.expressions, changed)
+
+    results: list[ParameterUpdateResult] = []
+    for name in plan.unknown:
+        results.append(
+            ParameterUpdateResult(
+                name,
+                changed[name],
+                ParameterUpdateResult.UNKNOWN,
+                f"A parameter with the name {name} does not exist in the model",
+            )
+        )
+    for cycle in plan.cycles:
+        for name in cycle:
+            if name in changed:
+                results.append(
+                    ParameterUpdateResult(
+                        name,
+                        changed[name],
+                        ParameterUpdateResult.CIRCULAR,
+                        f"Circular reference: {' -> '.join(cycle + cycle[:1])}",
+                    )
+                )
+
+    if batch and update_parameters_batch(design, plan.order, changed, state):
+        results += [
+            ParameterUpdateResult(name, changed[name], ParameterUpdateResult.APPLIED)
+            for name in plan.order
+        ]
+        return results
+
+    for param_name in plan.order:
+        if update_parameter(
+            ui, design, state.parameters, param_name, changed[param_name], state
+        ):
+            status = ParameterUpdateResult.APPLIED
+        else:
+            status = ParameterUpdateResult.FAILED
+        results.append(ParameterUpdateResult(param_name, changed[param_name], status))
+    return results
+
+
+def update_parameters_batch(
+    design: adsk.fusion.Design,
+    names: list[str],
+    expressions: dict[str, str],
+    state: ParameterState,
 ):
+    """Applies all the expressions as a single change with a single recompute.
+
+    Returns False if the design does not support modifying several parameters
+    at once or if the change was rejected, in which case nothing was changed.
+    """
+    if len(names) < 2:
+        return False
+    modify_parameters = getattr(design, "modifyParameters", None)
+    if modify_parameters is None:
+        return False
     try:
-        paramsList = [oParam.name for oParam in design.allParameters]
-        retryList: list[tuple[str, str]] = []
-
-        for param_name, param_expression in params.params.items():
-            if not update_parameter(
-                ui, design, paramsList, param_name, param_expression
-            ):
-                retryList.append((param_name, param_expression))
-        # let's keep going through the list until all is done
-        count = 0
-        while len(retryList) + 1 > count:
-            count = count + 1
-            flagged_successful: list[tuple[str, str]] = []
-            for params_tuple in retryList:
-                param_name, param_expression = params_tuple
-                if update_parameter(
-                    ui, design, paramsList, param_name, param_expression
-                ):
-                    flagged_successful.append(params_tuple)
-            for resolved in flagged_successful:
-                retryList.remove(resolved)
-
-        if len(retryList) > 0:
-            params_str = "\n".join([param for param, _ in retryList])
-
-            ui.messageBox(f"Could not set the following parameters: {params_str}")
-    except:
-        if ui:
-            ui.messageBox(f"AddIn Stop Failed:\n{traceback.format_exc()}")
+        parameters = [state.parameters[name] for name in names]
+        values = [
+            adsk.core.ValueInput.createByString(expressions[name]) for name in names
+        ]
+        with timing.span("update_parameters_batch", parameters=len(names)):
+            if not modify_parameters(parameters, values):
+                return False
+    except Exception:
+        futil.log(f"Batch parameter update failed:\n{traceback.format_exc()}")
+        return False
+    for name in names:
+        state.expressions[name] = expressions[name]
+    return True
 
 
 def update_parameter(
     ui: adsk.core.UserInterface,
     design: adsk.fusion.Design,
-    paramsList: list[str],
+    paramNames: Container[str],
     param: str,
     expression: str,
+    state: ParameterState | None = None,
 ):
     # get the values from the csv file.
     try:
         nameOfParam = param
         expressionOfParam = expression
     except Exception as e:
-        print(str(e))
+        futil.log(str(e))
         # makes no sense to retry
         return True
 
     try:
         # if the name of the parameter is not an existing parameter let the user know
-        if nameOfParam not in paramsList:
-            ui.messageBox(
+        if nameOfParam not in paramNames:
+            futil.log(
                 f"A parameter with the name {nameOfParam} does not exist in the model. It will be ignored"
             )
+            return False
 
         # update the values of existing parameters
         else:
-            paramInModel = design.allParameters.itemByName(nameOfParam)
-            paramInModel.expression = expressionOfParam
-            print("Updated {}".format(nameOfParam))
+            if state is not None:
+                paramInModel = state.parameters[nameOfParam]
+            else:
+                paramInModel = design.allParameters.itemByName(nameOfParam)
+            with timing.span("update_parameter", parameter=nameOfParam):
+                paramInModel.expression = expressionOfParam
+            if state is not None:
+                state.expressions[nameOfParam] = expressionOfParam
+            futil.trace("Updated %s", nameOfParam)
 
         return True
 
     except Exception as e:
-        print(str(e))
-        print("Failed to update {}".format(nameOfParam))
+        futil.log(f"Failed to update {nameOfParam}: {e}")
         return False
 
 
 def run(_):
+    global _job_watcher
     ui = None
 
     try:
@@ -439,6 +2306,17 @@ def run(_):
             BULK_EXPORT_COMMAND_NAME,
             BULK_EXPORT_COMMAND_DESCRIPTION,
         )
+        console_event = app.registerCustomEvent(futil.CONSOLE_EVENT_ID)
+        futil.add_handler(console_event, futil.write_console, name="console")
+        export_tick_event = app.registerCustomEvent(EXPORT_TICK_EVENT_ID)
+        futil.add_handler(export_tick_event, _on_export_tick, name="export tick")
+        run_job_event = app.registerCustomEvent(RUN_JOB_EVENT_ID)
+        futil.add_handler(run_job_event, _on_run_job, name="run job")
+        file_changed_event = app.registerCustomEvent(PARAMETER_FILE_CHANGED_EVENT_ID)
+        futil.add_handler(
+            file_changed_event, _on_parameter_file_changed, name="file changed"
+        )
+
         bulk_export_command_created = BulkExportCommandCreatedHandler()
         bulk_export_command_definition.commandCreated.add(bulk_export_command_created)
         _handlers.append(bulk_export_command_created)
@@ -467,6 +2345,17 @@ def run(_):
             )
             toolbar_control_panel.isVisible = True
             futil.log(f"{BULK_EXPORT_COMMAND_ID} successfully added to add ins panel")
+
+        # unattended runs, the jobs start once Fusion is idle
+        job_path = os.environ.get(config.JOB_FILE_ENVIRONMENT_VARIABLE)
+        if job_path:
+            app.fireCustomEvent(RUN_JOB_EVENT_ID, job_path)
+        if config.JOB_FOLDER:
+            _job_watcher = JobFolderWatcher(
+                lambda: app.fireCustomEvent(RUN_JOB_EVENT_ID),
+                config.JOB_POLL_INTERVAL,
+            )
+            _job_watcher.start()
     except Exception:
         if ui:
             ui.messageBox("AddIn Start Failed:\n{}".format(traceback.format_exc()))
@@ -478,6 +2367,17 @@ def stop(_):
     try:
         app = adsk.core.Application.get()
         ui = app.userInterface
+        if _job_watcher is not None:
+            _job_watcher.stop()
+        if _parameter_watch is not None:
+            _parameter_watch.stop()
+        _queued_jobs.clear()
+        if _active_job is not None:
+            _active_job.finish("Export cancelled", completed=False)
+        app.unregisterCustomEvent(futil.CONSOLE_EVENT_ID)
+        app.unregisterCustomEvent(EXPORT_TICK_EVENT_ID)
+        app.unregisterCustomEvent(RUN_JOB_EVENT_ID)
+        app.unregisterCustomEvent(PARAMETER_FILE_CHANGED_EVENT_ID)
         obj_array: list[adsk.core.ToolbarControl | adsk.core.CommandDefinition] = []
 
         command_control_panel = command_control_by_id_for_panel(BULK_EXPORT_COMMAND_ID)
@@ -492,5 +2392,6 @@ def stop(_):
             destroy_object(ui, obj)
 
         futil.clear_handlers()
+        futil.flush_log()
     except Exception:
         futil.handle_error("stop")
@@ -0,0 +1,131 @@
+from __future__ import annotations
+import json
+import os
+import time
+from pathlib import Path
+
+JOURNAL_FILE_NAME = ".bulk-export-journal.jsonl"
+
+
+class RunJournal:
+    """An append-only log in the output folder of every file a run starts and
+    finishes writing, so an interrupted run can be resumed.
+
+    The journal starts with a "run" record identifying the run. A new run
+    replaces the journal, a resumed one keeps appending to it. The paths in it
+    are relative to the output folder, the journal itself can be kept
+    elsewhere.
+    """
+
+    def __init__(self, folder: str, run_id: str, path: str | None = None):
+        self.folder = Path(folder)
+        self.path = Path(path) if path is not None else self.folder / JOURNAL_FILE_NAME
+        self.run_id = run_id
+        self.completed: dict[tuple[str, str], dict] = {}
+        self.partial: dict[tuple[str, str], str] = {}
+        self._file = None
+
+    def _read(self):
+        records: list[dict] = []
+        try:
+            with open(self.path, encoding="utf-8") as journal_file:
+                for line in journal_file:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # the last line may have been cut off by a crash
+                        continue
+        except FileNotFoundError:
+            pass
+        return records
+
+    def open(self, resume: bool):
+        """Starts writing the journal.
+
+        Returns True if the previous run was picked up where it stopped.
+        """
+        records = self._read() if resume else []
+        resumed = bool(records) and records[0].get("run") == self.run_id
+        if resumed:
+            for record in records[1:]:
+                key = (record.get("name"), record.get("format"))
+                if record.get("event") == "start":
+                    self.partial[key] = record["path"]
+                    self.completed.pop(key, None)
+                elif record.get("event") == "done":
+                    self.partial.pop(key, None)
+                    self.completed[key] = record
+                elif record.get("event") == "forget":
+                    self._forget(record.get("name"))
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._write({"event": "run", "run": self.run_id, "time": time.time()}, True)
+        return resumed
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, record: dict, durable: bool = False):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if durable:
+            os.fsync(self._file.fileno())
+
+    def is_completed(self, export_name: str, export_format: str):
+        """Returns True if the file was completely written by the resumed run."""
+        record = self.completed.get((export_name, export_format))
+        if record is None:
+            return False
+        try:
+            return (self.folder / record["path"]).stat().st_size == record["size"]
+        except OSError:
+            return False
+
+    def forget(self, export_name: str):
+        """Makes the files of a variant count as not written, so a resumed run
+        exports them again."""
+        if self._forget(export_name):
+            self._write({"event": "forget", "name": export_name})
+
+    def _forget(self, export_name: str):
+        keys = [key for key in self.completed if key[0] == export_name]
+        for key in keys:
+            del self.completed[key]
+        return bool(keys)
+
+    def remove_partial_files(self):
+        """Deletes the files the resumed run started but did not finish."""
+        removed = []
+        for path in self.partial.values():
+            try:
+                os.remove(self.folder / path)
+                removed.append(path)
+            except FileNotFoundError:
+                pass
+        self.partial.clear()
+        return removed
+
+    def started(self, export_name: str, export_format: str, path: str):
+        self._write(
+            {
+                "event": "start",
+                "name": export_name,
+                "format": export_format,
+                "path": os.path.relpath(path, self.folder),
+            }
+        )
+
+    def done(self, export_name: str, export_format: str, path: str):
+        self._write(
+            {
+                "event": "done",
+                "name": export_name,
+                "format": export_format,
+                "path": os.path.relpath(path, self.folder),
+                "size": os.stat(path).st_size,
+            },
+            durable=True,
+        )
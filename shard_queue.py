@@ -0,0 +1,236 @@
+from __future__ import annotations
+import json
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+QUEUE_FOLDER_NAME = ".bulk-export-queue"
+_SETTINGS_FILE_NAME = "queue.json"
+# version of the queue files, instances only join queues of their own version.
+# 2: shards hold whole rows, a value per column of queue.json, instead of the
+# export name and expressions of the parameters
+QUEUE_FORMAT = 2
+
+
+def _write_atomic(path: Path, data: dict):
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as temp_file:
+        json.dump(data, temp_file)
+    os.replace(temp_path, path)
+
+
+def default_worker_id():
+    # several Fusion instances can run on the same machine
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _read(path: Path):
+    with open(path, encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+class QueueBusyError(RuntimeError):
+    pass
+
+
+class Shard:
+    def __init__(self, shard_id: str, variants: list[list[str]]):
+        self.id = shard_id
+        self.variants = variants
+
+
+class ShardQueue:
+    """A queue of variants split into shards, kept as files in a shared folder
+    so several Fusion instances can export parts of the same run at once.
+
+    A worker claims a shard by creating its lease file, which fails if another
+    worker holds it. The lease records the time of the worker's last
+    heartbeat. Leases without a heartbeat for lease_timeout seconds are stale
+    and may be taken over by another worker. A finished shard gets a marker
+    in the done folder.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        worker_id: str,
+        lease_timeout: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.folder = Path(folder) / QUEUE_FOLDER_NAME
+        self.worker_id = worker_id
+        self.lease_timeout = lease_timeout
+        self.clock = clock
+        self._shards = self.folder / "shards"
+        self._leases = self.folder / "leases"
+        self._done = self.folder / "done"
+        self._workers = self.folder / "workers"
+
+    def exists(self):
+        return (self.folder / _SETTINGS_FILE_NAME).exists()
+
+    def create(
+        self,
+        columns: list[str],
+        variants: Iterable[list[str]],
+        shard_size: int,
+        settings: dict,
+    ):
+        """Replaces the queue with a new one holding the given variants.
+
+        Arguments:
+        columns -- The names of the columns of the variants.
+        variants -- The row of every variant, a value per column.
+        shard_size -- How many variants a worker claims at once.
+        settings -- Anything the workers need to know about the run.
+
+        :returns:
+            The number of variants in the queue.
+        """
+        workers = self.active_workers()
+        if workers:
+            # their shards would be deleted while they export them
+            raise QueueBusyError(
+                f"Other instances are still exporting: {', '.join(workers)}"
+            )
+        for folder in [self._shards, self._leases, self._done, self._workers]:
+            folder.mkdir(parents=True, exist_ok=True)
+            for path in folder.iterdir():
+                path.unlink()
+        count = 0
+        shard: list[list[str]] = []
+        shard_count = 0
+
+        def write_shard():
+            _write_atomic(self._shards / f"{shard_count:06d}.json", {"variants": shard})
+
+        for variant in variants:
+            shard.append(variant)
+            count += 1
+            if len(shard) >= shard_size:
+                write_shard()
+                shard_count += 1
+                shard = []
+        if shard:
+            write_shard()
+        # written last, workers only join once the queue is complete
+        _write_atomic(
+            self.folder / _SETTINGS_FILE_NAME,
+            {
+                "format": QUEUE_FORMAT,
+                "columns": columns,
+                "variants": count,
+                "settings": settings,
+            },
+        )
+        return count
+
+    def info(self) -> dict:
+        """Returns the column names, the number of variants and the
+        settings the queue was created with."""
+        return _read(self.folder / _SETTINGS_FILE_NAME)
+
+    def is_compatible(self):
+        """Whether the queue was created by a version of the add-in that
+        stores its shards the way this one does."""
+        return self.info().get("format") == QUEUE_FORMAT
+
+    def active_workers(self):
+        """The workers other than this one whose leases did not expire."""
+        if not self._leases.exists():
+            return []
+        workers = set()
+        for lease_path in self._leases.glob("*.lease"):
+            try:
+                lease = _read(lease_path)
+            except (OSError, ValueError):
+                # being written right now, or already released
+                if lease_path.exists():
+                    workers.add("unknown")
+                continue
+            if self.clock() - lease["heartbeat"] < self.lease_timeout:
+                workers.add(lease["worker"])
+        workers.discard(self.worker_id)
+        return sorted(workers)
+
+    def worker_path(self, file_name: str):
+        """A path inside the queue for a file only this worker writes to."""
+        return str(self._workers / f"{self.worker_id}-{file_name}")
+
+    def _lease_path(self, shard_id: str):
+        return self._leases / f"{shard_id}.lease"
+
+    def _try_lease(self, shard_id: str):
+        lease_path = self._lease_path(shard_id)
+        try:
+            descriptor = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                lease = _read(lease_path)
+            except (OSError, ValueError):
+                # being written or taken over right now
+                return False
+            if self.clock() - lease["heartbeat"] < self.lease_timeout:
+                return False
+            # only one worker can move the stale lease out of the way
+            try:
+                os.replace(
+                    lease_path, lease_path.with_suffix(f".stale-{self.worker_id}")
+                )
+            except OSError:
+                return False
+            os.remove(lease_path.with_suffix(f".stale-{self.worker_id}"))
+            return self._try_lease(shard_id)
+        with os.fdopen(descriptor, "w", encoding="utf-8") as lease_file:
+            json.dump({"worker": self.worker_id, "heartbeat": self.clock()}, lease_file)
+        return True
+
+    def claim(self) -> Shard | None:
+        """Leases the next shard no worker is exporting, or returns None once
+        there is none left."""
+        done = {path.stem for path in self._done.iterdir()}
+        for shard_path in sorted(self._shards.iterdir()):
+            shard_id = shard_path.stem
+            if shard_id in done or not self._try_lease(shard_id):
+                continue
+            if (self._done / f"{shard_id}.json").exists():
+                # finished by another worker after the listing above
+                self.release(Shard(shard_id, []))
+                continue
+            return Shard(shard_id, _read(shard_path)["variants"])
+        return None
+
+    def heartbeat(self, shard: Shard):
+        """Renews the lease. Returns False if another worker took it over."""
+        lease_path = self._lease_path(shard.id)
+        try:
+            if _read(lease_path)["worker"] != self.worker_id:
+                return False
+        except (OSError, ValueError):
+            return False
+        _write_atomic(lease_path, {"worker": self.worker_id, "heartbeat": self.clock()})
+        return True
+
+    def complete(self, shard: Shard):
+        _write_atomic(
+            self._done / f"{shard.id}.json",
+            {"worker": self.worker_id, "finished": self.clock()},
+        )
+        self.release(shard)
+
+    def release(self, shard: Shard):
+        """Gives up the lease so another worker can claim the shard."""
+        lease_path = self._lease_path(shard.id)
+        try:
+            if _read(lease_path)["worker"] == self.worker_id:
+                lease_path.unlink()
+        except (OSError, ValueError):
+            pass
+
+    def progress(self):
+        """Returns the number of finished and of all shards."""
+        done = sum(1 for _ in self._done.iterdir())
+        total = sum(1 for _ in self._shards.iterdir())
+        return done, total
@@ -0,0 +1,258 @@
+from __future__ import annotations
+import ast
+import itertools
+import json
+import math
+import operator
+import re
+from typing import Iterator
+
+_NUMBER_PATTERN = re.compile(r"\s*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)")
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_COMPARE_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+_FUNCTIONS = {"abs": abs, "min": min, "max": max, "round": round, "sqrt": math.sqrt}
+
+
+class SweepSpecError(ValueError):
+    pass
+
+
+def _format_number(value: float):
+    # ranges accumulate float errors, 0.1 * 3 should still be called 0.3
+    value = round(value, 10)
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class _Value:
+    """A value of a swept parameter: the expression that is applied to the
+    model, the text used in export names and the number used in constraints."""
+
+    __slots__ = ("expression", "text", "number")
+
+    def __init__(self, raw, unit: str):
+        if isinstance(raw, bool) or not isinstance(raw, (int, float, str)):
+            raise SweepSpecError(f"Unsupported value {raw!r}")
+        if isinstance(raw, str):
+            self.text = raw
+            match = _NUMBER_PATTERN.match(raw)
+            self.number = float(match.group(1)) if match else None
+        else:
+            self.text = _format_number(raw)
+            self.number = float(raw)
+        self.expression = f"{self.text} {unit}" if unit else self.text
+
+
+def _parameter_values(name: str, definition) -> list[_Value]:
+    if isinstance(definition, list):
+        return [_Value(raw, "") for raw in definition]
+    if not isinstance(definition, dict):
+        return [_Value(definition, "")]
+    unit = definition.get("unit", "")
+    if "values" in definition:
+        return [_Value(raw, unit) for raw in definition["values"]]
+    if "range" in definition:
+        try:
+            start, stop, step = definition["range"]
+        except (TypeError, ValueError):
+            raise SweepSpecError(f"The range of {name} must be [start, stop, step]")
+        for bound in (start, stop, step):
+            if isinstance(bound, bool) or not isinstance(bound, (int, float)):
+                raise SweepSpecError(
+                    f"The range of {name} must be numbers, not {bound!r}"
+                )
+        if not step or (stop - start) / step < 0:
+            raise SweepSpecError(f"The range of {name} never reaches its end")
+        count = math.floor((stop - start) / step + 1e-9) + 1
+        return [_Value(start + index * step, unit) for index in range(count)]
+    raise SweepSpecError(f"{name} needs either 'values' or 'range'")
+
+
+class _Constraint:
+    def __init__(self, source: str, names: set[str]):
+        self.source = source
+        try:
+            self.tree = ast.parse(source, mode="eval").body
+        except SyntaxError:
+            raise SweepSpecError(f"Invalid constraint: {source}")
+        for node in ast.walk(self.tree):
+            if isinstance(node, ast.Name) and node.id not in names | _FUNCTIONS.keys():
+                raise SweepSpecError(f"Unknown name {node.id} in constraint {source}")
+
+    def holds(self, numbers: dict[str, float | None]):
+        try:
+            return bool(self._evaluate(self.tree, numbers))
+        except SweepSpecError:
+            raise
+        except (ArithmeticError, ValueError, TypeError) as e:
+            # like a division by zero or the root of a negative number
+            values = ", ".join(f"{name} = {value}" for name, value in numbers.items())
+            raise SweepSpecError(
+                f"The constraint {self.source} cannot be evaluated for {values}: {e}"
+            )
+
+    def _evaluate(self, node, numbers):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.Name):
+            value = numbers[node.id]
+            if value is None:
+                raise SweepSpecError(
+                    f"{node.id} is not a number in constraint {self.source}"
+                )
+            return value
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            return _BINARY_OPERATORS[type(node.op)](
+                self._evaluate(node.left, numbers), self._evaluate(node.right, numbers)
+            )
+        if isinstance(node, ast.UnaryOp):
+            operand = self._evaluate(node.operand, numbers)
+            if isinstance(node.op, ast.USub):
+                return -operand
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            if isinstance(node.op, ast.Not):
+                return not operand
+        if isinstance(node, ast.BoolOp):
+            values = (self._evaluate(value, numbers) for value in node.values)
+            return all(values) if isinstance(node.op, ast.And) else any(values)
+        if isinstance(node, ast.Compare):
+            left = self._evaluate(node.left, numbers)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._evaluate(comparator, numbers)
+                if type(op) not in _COMPARE_OPERATORS:
+                    break
+                if not _COMPARE_OPERATORS[type(op)](left, right):
+                    return False
+                left = right
+            else:
+                return True
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in _FUNCTIONS
+            and not node.keywords
+        ):
+            return _FUNCTIONS[node.func.id](
+                *(self._evaluate(arg, numbers) for arg in node.args)
+            )
+        raise SweepSpecError(f"Unsupported expression in constraint {self.source}")
+
+
+class SweepSpec:
+    """Describes a parameter sweep compactly instead of listing every variant.
+
+    Example::
+
+        {
+            "export_name": "bracket_{width}_{height}",
+            "parameters": {
+                "width": {"range": [10, 50, 10], "unit": "mm"},
+                "height": {"values": [5, 10], "unit": "mm"},
+                "hole": ["3 mm", "4 mm"],
+                "fillet_a": [1, 2],
+                "fillet_b": [3, 4]
+            },
+            "zip": [["fillet_a", "fillet_b"]],
+            "constraints": ["height < width"]
+        }
+
+    Every parameter is combined with every other one (a cartesian product),
+    except for the ones listed together in "zip", whose values are used in
+    lockstep. Combinations for which a constraint does not hold are left out.
+    The export name template can use the parameter names and {index}.
+    """
+
+    def __init__(self, data: dict):
+        if not isinstance(data, dict) or not isinstance(data.get("parameters"), dict):
+            raise SweepSpecError("A sweep needs a 'parameters' object")
+        self.export_name = data.get("export_name", "variant_{index}")
+        self.parameter_names = list(data["parameters"])
+        if "index" in self.parameter_names:
+            raise SweepSpecError(
+                "A parameter cannot be called index, the export name template "
+                "uses it for the number of the variant"
+            )
+        values = {
+            name: _parameter_values(name, definition)
+            for name, definition in data["parameters"].items()
+        }
+
+        # every group of parameters is iterated as one column of the product
+        self._groups: list[tuple[list[str], list[tuple[_Value, ...]]]] = []
+        zipped: set[str] = set()
+        for names in data.get("zip", []):
+            unknown = [name for name in names if name not in values]
+            if unknown or zipped.intersection(names):
+                raise SweepSpecError(f"Invalid zip group {names}")
+            lengths = {len(values[name]) for name in names}
+            if len(lengths) != 1:
+                raise SweepSpecError(f"The zipped parameters {names} differ in length")
+            zipped.update(names)
+            self._groups.append(
+                (list(names), list(zip(*(values[name] for name in names))))
+            )
+        for name in self.parameter_names:
+            if name not in zipped:
+                self._groups.append(([name], [(value,) for value in values[name]]))
+
+        self._constraints = [
+            _Constraint(source, set(self.parameter_names))
+            for source in data.get("constraints", [])
+        ]
+        try:
+            self.export_name.format(
+                index=0, **{name: "" for name in self.parameter_names}
+            )
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            raise SweepSpecError(f"Invalid export name template: {e}")
+
+    @classmethod
+    def load(cls, file_path: str):
+        with open(file_path, encoding="utf-8") as spec_file:
+            try:
+                data = json.load(spec_file)
+            except ValueError as e:
+                raise SweepSpecError(f"The sweep file is not valid JSON: {e}")
+        return cls(data)
+
+    def variants(self) -> Iterator[tuple[str, list[str]]]:
+        """Lazily yields the export name and the expressions, in the order of
+        parameter_names, of every variant of the sweep."""
+        group_names = [names for names, _ in self._groups]
+        index = 0
+        for combination in itertools.product(*(rows for _, rows in self._groups)):
+            chosen: dict[str, _Value] = {}
+            for names, row in zip(group_names, combination):
+                chosen.update(zip(names, row))
+            if self._constraints:
+                numbers = {name: value.number for name, value in chosen.items()}
+                if not all(
+                    constraint.holds(numbers) for constraint in self._constraints
+                ):
+                    continue
+            try:
+                name = self.export_name.format(
+                    index=index, **{name: value.text for name, value in chosen.items()}
+                )
+            except (KeyError, IndexError, ValueError, TypeError) as e:
+                raise SweepSpecError(f"Invalid export name template: {e}")
+            index += 1
+            yield name, [chosen[name].expression for name in self.parameter_names]
@@ -0,0 +1,12 @@
+import sys
+import types
+from pathlib import Path
+
+ADD_IN_FOLDER = Path(__file__).resolve().parent.parent
+
+# the add-in is a package named after its folder inside Fusion, its modules
+# import each other relatively
+if "bulk_export" not in sys.modules:
+    package = types.ModuleType("bulk_export")
+    package.__path__ = [str(ADD_IN_FOLDER)]
+    sys.modules["bulk_export"] = package
@@ -0,0 +1,71 @@
+from bulk_export.parameter_planner import find_references, plan_parameters
+
+
+def test_applies_parameters_after_the_ones_they_reference():
+    model = {"a": "1 mm", "b": "2 mm", "c": "3 mm"}
+    plan = plan_parameters(model, {"a": "b + 1 mm", "b": "c * 2", "c": "5 mm"})
+    assert plan.order == ["c", "b", "a"]
+    assert plan.unknown == [] and plan.cycles == []
+
+
+def test_keeps_the_file_order_of_independent_parameters():
+    model = {"a": "1 mm", "b": "2 mm", "c": "3 mm"}
+    plan = plan_parameters(model, {"c": "1 mm", "a": "2 mm", "b": "3 mm"})
+    assert plan.order == ["c", "a", "b"]
+
+
+def test_orders_through_parameters_that_are_not_changed():
+    # b is not changed, but a depends on c through it
+    model = {"a": "1 mm", "b": "c + 1 mm", "c": "3 mm"}
+    plan = plan_parameters(model, {"a": "b * 2", "c": "4 mm"})
+    assert plan.order == ["c", "a"]
+
+
+def test_orders_long_chains_without_recursion():
+    model = {f"p{index}": "1 mm" for index in range(5000)}
+    overrides = {f"p{index}": f"p{index + 1} + 1 mm" for index in range(4999)}
+    overrides["p4999"] = "2 mm"
+    plan = plan_parameters(model, overrides)
+    assert plan.order == [f"p{index}" for index in reversed(range(5000))]
+
+
+def test_reports_cycles_and_leaves_their_parameters_out():
+    model = {"a": "1 mm", "b": "2 mm", "c": "3 mm"}
+    plan = plan_parameters(model, {"a": "b + 1 mm", "b": "a + 1 mm", "c": "1 mm"})
+    assert plan.order == ["c"]
+    assert plan.cycles == [["a", "b"]]
+
+
+def test_finds_cycles_through_the_model():
+    model = {"a": "1 mm", "b": "a * 2"}
+    plan = plan_parameters(model, {"a": "b + 1 mm"})
+    assert plan.order == []
+    assert plan.cycles == [["a", "b"]]
+
+
+def test_reports_parameters_missing_from_the_model():
+    plan = plan_parameters({"a": "1 mm"}, {"a": "2 mm", "missing": "3 mm"})
+    assert plan.order == ["a"]
+    assert plan.unknown == ["missing"]
+
+
+def test_leaves_units_and_functions_to_fusion():
+    model = {"a": "1 mm", "b": "2 mm"}
+    overrides = {
+        "a": "2 mm * kgf / kgf",
+        "b": "max(a; 1 ozmass / ozmass * 3 in) + sqrt(PI) * 1 mm",
+    }
+    plan = plan_parameters(model, overrides)
+    assert plan.order == ["a", "b"]
+    assert plan.unknown == [] and plan.cycles == []
+
+
+def test_parameters_named_like_units_are_still_parameters():
+    model = {"h": "1 mm", "a": "2 mm"}
+    plan = plan_parameters(model, {"a": "h * 2", "h": "3 mm"})
+    assert plan.order == ["h", "a"]
+
+
+def test_finds_names_but_not_text_or_exponents():
+    assert find_references("1e3 * width + 'height' + \"depth\"") == {"width"}
+    assert find_references("2.5E-2 mm") == {"mm"}
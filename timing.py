@@ -0,0 +1,208 @@
+from __future__ import annotations
+import contextlib
+import heapq
+import json
+import math
+import os
+import threading
+import time
+
+TIMINGS_FILE_NAME = "bulk-export-timings.jsonl"
+TRACE_FILE_NAME = "bulk-export-trace.json"
+SLOWEST_VARIANTS = 10
+# durations are counted in buckets this much wider than the one before, which
+# keeps the percentiles within 5 % of the exact ones
+BUCKET_GROWTH = 1.05
+SMALLEST_DURATION = 1e-6
+
+_recorder: SpanRecorder | None = None
+
+
+class Span:
+    __slots__ = ("stage", "variant", "start", "duration", "thread", "args")
+
+    def __init__(self, stage: str, variant: str | None, start: float, args: dict):
+        self.stage = stage
+        self.variant = variant
+        self.start = start
+        self.duration = 0.0
+        self.thread = threading.get_ident()
+        self.args = args
+
+    def to_dict(self):
+        return {
+            "stage": self.stage,
+            "variant": self.variant,
+            "start": self.start,
+            "seconds": self.duration,
+            **self.args,
+        }
+
+
+class StageTimes:
+    """The durations of a stage, counted in buckets so the memory they take
+    does not grow with the number of variants."""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets: dict[int, int] = {}
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        bucket = 0
+        if duration > SMALLEST_DURATION:
+            bucket = int(math.log(duration / SMALLEST_DURATION, BUCKET_GROWTH)) + 1
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, percent: float):
+        """The nearest-rank percentile, rounded up to the end of its bucket."""
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.max, SMALLEST_DURATION * BUCKET_GROWTH**bucket)
+        return self.max
+
+
+class SpanRecorder:
+    """Collects how long every stage of every variant took.
+
+    Arguments:
+    trace_limit -- How many spans to keep for write_jsonl and
+                   write_chrome_trace, 0 to keep none.
+    """
+
+    def __init__(self, trace_limit: int = 0):
+        self.stages: dict[str, StageTimes] = {}
+        # the slowest variants as a heap of their seconds and names
+        self.slowest: list[tuple[float, str]] = []
+        self.trace_limit = trace_limit
+        self.spans: list[Span] = []
+        self.dropped = 0
+        self.variant: str | None = None
+        self._origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def span(self, stage: str, variant: str | None = None, **args):
+        """Times the code inside the with block. Spans opened inside of the
+        span of a variant belong to that variant."""
+        outer_variant = self.variant
+        if variant is not None:
+            self.variant = variant
+        span = Span(stage, self.variant, time.perf_counter() - self._origin, args)
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - self._origin - span.start
+            self.add(span)
+            self.variant = outer_variant
+
+    def add(self, span: Span):
+        times = self.stages.get(span.stage)
+        if times is None:
+            times = self.stages[span.stage] = StageTimes()
+        times.add(span.duration)
+        if span.stage == "variant":
+            entry = (span.duration, span.variant)
+            if len(self.slowest) < SLOWEST_VARIANTS:
+                heapq.heappush(self.slowest, entry)
+            elif entry > self.slowest[0]:
+                heapq.heapreplace(self.slowest, entry)
+        if len(self.spans) < self.trace_limit:
+            self.spans.append(span)
+        elif self.trace_limit:
+            self.dropped += 1
+
+    @property
+    def traced(self):
+        return self.trace_limit > 0
+
+    def write_jsonl(self, path: str):
+        with open(path, "w", encoding="utf-8") as timings_file:
+            for span in self.spans:
+                timings_file.write(json.dumps(span.to_dict()) + "\n")
+
+    def write_chrome_trace(self, path: str):
+        """Writes the spans in the trace event format that chrome://tracing
+        and Perfetto can open."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.stage,
+                "cat": "bulk-export",
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread,
+                "args": {"variant": span.variant, **span.args},
+            }
+            for span in self.spans
+        ]
+        with open(path, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+
+    def summary(self):
+        """Returns the number, total, maximum and the 50th and 95th percentile
+        of every stage in seconds and the variants that took longest."""
+        stages = {
+            stage: {
+                "count": times.count,
+                "total": times.total,
+                "max": times.max,
+                "p50": times.percentile(50),
+                "p95": times.percentile(95),
+            }
+            for stage, times in self.stages.items()
+        }
+        summary = {
+            "stages": stages,
+            "slowest_variants": [
+                {"variant": name, "seconds": seconds}
+                for seconds, name in sorted(self.slowest, reverse=True)
+            ],
+        }
+        if self.dropped:
+            summary["untraced_spans"] = self.dropped
+        return summary
+
+
+def describe(summary: dict):
+    lines = [
+        f"{stage}: p50 {values['p50'] * 1000:.1f} ms, p95 {values['p95'] * 1000:.1f} ms"
+        f", max {values['max'] * 1000:.1f} ms over {values['count']}"
+        for stage, values in summary["stages"].items()
+    ]
+    lines += [
+        f"slow variant {entry['variant']}: {entry['seconds']:.2f} s"
+        for entry in summary["slowest_variants"]
+    ]
+    return "\n".join(lines)
+
+
+def start_recording(trace_limit: int = 0):
+    global _recorder
+    _recorder = SpanRecorder(trace_limit)
+    return _recorder
+
+
+def stop_recording():
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+def span(stage: str, variant: str | None = None, **args):
+    """Times a stage with the recorder of the running export, if any."""
+    if _recorder is None:
+        return contextlib.nullcontext()
+    return _recorder.span(stage, variant, **args)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+from typing import Any, Sequence
+
+# Above this many variations the quadratic nearest neighbour search costs more
+# time than it is likely to save, so only the snake ordering is used.
+NEAREST_NEIGHBOUR_LIMIT = 500
+
+# Variations are anything with a `params` dict mapping parameter names to
+# expressions, usually the ParameterList rows of the loaded CSV.
+Variation = Any
+
+
+def _changes(
+    previous: dict[str, str], current: dict[str, str], weights: dict[str, float]
+):
+    return sum(
+        weights.get(name, 1.0)
+        for name, expression in current.items()
+        if previous.get(name) != expression
+    )
+
+
+def total_cost(variations: Sequence[Variation], weights: dict[str, float]):
+    params = [variation.params for variation in variations]
+    return sum(
+        _changes(previous, current, weights)
+        for previous, current in zip(params, params[1:])
+    )
+
+
+# The ordering works on (params, variation) pairs, so the params of every
+# variation are only looked up once.
+Entry = tuple[dict[str, str], Variation]
+
+
+def _snake_order(
+    entries: list[Entry], columns: list[str], reverse: bool
+) -> list[Entry]:
+    # Group by the first column and order every group by the remaining ones,
+    # alternating the direction so the last variation of one group and the
+    # first of the next share as many values as possible (like a Gray code).
+    if len(entries) <= 1 or not columns:
+        return entries
+    column, remaining = columns[0], columns[1:]
+    groups: dict[str, list[Entry]] = {}
+    for entry in entries:
+        groups.setdefault(entry[0].get(column, ""), []).append(entry)
+    ordered: list[Entry] = []
+    for index, key in enumerate(sorted(groups, reverse=reverse)):
+        ordered += _snake_order(groups[key], remaining, index % 2 == 1)
+    return ordered
+
+
+def _nearest_neighbour_order(
+    entries: list[Entry], weights: dict[str, float]
+) -> list[Entry]:
+    remaining = entries[1:]
+    ordered = entries[:1]
+    while remaining:
+        last = ordered[-1][0]
+        costs = [_changes(last, candidate[0], weights) for candidate in remaining]
+        ordered.append(remaining.pop(costs.index(min(costs))))
+    return ordered
+
+
+def _entries_cost(entries: list[Entry], weights: dict[str, float]):
+    return sum(
+        _changes(previous[0], current[0], weights)
+        for previous, current in zip(entries, entries[1:])
+    )
+
+
+def schedule_variations(
+    variations: Sequence[Variation], weights: dict[str, float]
+) -> list[Variation]:
+    """Reorders the variations to reduce the parameter changes between
+    consecutive ones.
+
+    Arguments:
+    variations -- The variations to export.
+    weights -- The relative cost of changing a parameter, by name. Parameters
+               that are not listed have a weight of 1.
+    """
+    entries = [(variation.params, variation) for variation in variations]
+    columns = sorted(
+        {name for params, _ in entries for name in params},
+        key=lambda name: (-weights.get(name, 1.0), name),
+    )
+    best = _snake_order(entries, columns, False)
+    if len(entries) <= NEAREST_NEIGHBOUR_LIMIT:
+        candidate = _nearest_neighbour_order(best, weights)
+        if _entries_cost(candidate, weights) < _entries_cost(best, weights):
+            best = candidate
+    return [variation for _, variation in best]